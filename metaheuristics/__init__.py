@@ -1 +1,4 @@
-from metaheuristics import algorithms, abstract, utils
+from metaheuristics import (
+    algorithms, abstract, cache, checkpoint, crossover, evaluators, exact, moves,
+    population, sampling, shared, stats, tabu, termination, utils,
+)
@@ -1,4 +1,7 @@
 import abc
+import math
+
+import numpy as np
 
 
 class Problem(abc.ABC):
@@ -30,6 +33,64 @@ class Problem(abc.ABC):
     def __hash__(self):
         ...
 
+    def evaluate_batch(self, sequences):
+        """
+        Return the costs of `sequences` as a NumPy vector.
+
+        Override with a vectorized implementation when the objective allows it;
+        the default simply scores every sequence through `Solution.cost`.
+        """
+        return np.array(
+            [
+                self.solution(
+                    sequence=s.tolist() if isinstance(s, np.ndarray) else s
+                ).cost
+                for s in sequences
+            ],
+            dtype=float,
+        )
+
+    def delta_cost(self, solution, move):
+        """
+        Return the cost change caused by applying `move` to `solution`.
+
+        Override with an incremental computation (see `moves.path_delta`);
+        the default evaluates the moved solution from scratch.
+        """
+        return move(solution).cost - solution.cost
+
+    @property
+    def constraints(self):
+        """
+        Constraint structure (`moves.Constraints`) operators can use to only
+        generate feasible moves, or None when the problem does not expose it.
+
+        When given, it must describe every constraint checked by
+        `Solution.correct`.
+        """
+        return None
+
+    def feasible_move(self, solution, move):
+        """
+        Whether applying `move` to the correct `solution` keeps it correct,
+        or None when that cannot be told without applying it.
+
+        The default checks `constraints` incrementally, if any; override
+        with a cheaper problem-specific check.
+        """
+        if self.constraints is None:
+            return None
+        return self.constraints.allows(solution.sequence, move)
+
+    def lower_bound(self, partial):
+        """
+        Return a lower bound on the cost of every completion of the partial
+        solution `partial`, for branch and bound in `exact`.
+
+        The default bound prunes nothing.
+        """
+        return -math.inf
+
 
 class Solution(abc.ABC):
     def __init__(self, problem, sequence=None):
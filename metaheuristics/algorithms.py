@@ -1,32 +1,74 @@
 import abc
 import copy
 import math
+import os
 import random
 import statistics
 import time
+import warnings
 
 from colorama import Fore, Style
-from collections import defaultdict
-from itertools import chain, permutations
-from functools import total_ordering
-from metaheuristics import utils
+from collections import defaultdict, deque
+from itertools import chain
+from functools import partial, total_ordering
+from metaheuristics import (
+    abstract, cache, checkpoint, crossover, exact, moves, sampling, shared, stats,
+    tabu, termination, utils,
+)
+from metaheuristics.population import ArrayPopulation
 
-from multiprocessing import Pool
+from multiprocessing import Pipe, Pool, Process
 
 import dill
+import numpy as np
+
+
+_worker_solver = None
+_calibrations = {}
+
+
+def init_worker(solver):
+    global _worker_solver
+    random.seed()
+    np.random.seed()
+    solver.rng = np.random.default_rng()
+    _worker_solver = solver
 
 
 @total_ordering
 class Metaheuristic(abc.ABC):
 
     abort_iter = 0.2
+    n_evaluations = 0
+    recordings = ("all", "best", "none")
 
     def __init__(self, problem, *args, **kwargs):
         super().__init__()
         kwargs.setdefault("n_iters", 5000 * problem.difficulty)
         kwargs.setdefault("search_operator", utils.pitch)
+        kwargs.setdefault("population_backend", "list")
+        kwargs.setdefault("record", "all")
+        kwargs.setdefault("record_every", 1)
+        kwargs.setdefault("record_last", None)
+        kwargs.setdefault("count_distinct", False)
+        kwargs.setdefault("seed", None)
+        kwargs.setdefault("checkpoint", None)
+        kwargs.setdefault("checkpoint_every", 100)
+        kwargs.setdefault("time_limit", None)
+        kwargs.setdefault("max_evaluations", None)
+        kwargs.setdefault("target_cost", None)
+        kwargs.setdefault("termination", None)
+        kwargs.setdefault("evaluator", None)
+        kwargs.setdefault("profile", None)
+        kwargs.setdefault("max_retries", 100)
         self.problem = problem
         self.config = kwargs
+        if self.record not in self.recordings:
+            raise ValueError(f"Unknown record {self.record!r}")
+        if not isinstance(self.record_every, int) or self.record_every < 1:
+            raise ValueError(
+                f"record_every must be a positive integer, got {self.record_every!r}"
+            )
 
     def __repr__(self):
         return f"{self.__class__.__name__}(problem={self.problem!r}, **{self.config})"
@@ -39,6 +81,7 @@ class Metaheuristic(abc.ABC):
             f"Duration: {round(self.duration, 2)} sec",
             f"Rate: {round(self.rate, 2)} iter/sec",
             f"Cache Stats: {self.cache_info}",
+            f"Evaluations: {self.evaluations}",
             (
                 f"Iterations: {self.iteration}/{self.n_iters}"
                 f" (Aborted @ {int(self.abort_iter * self.n_iters)})"
@@ -58,15 +101,32 @@ class Metaheuristic(abc.ABC):
     def __iter__(self):
         self.population = []
         self.best_population = []
-        self.rep = []
-        self.bests = []
+        self.rep = deque(maxlen=self.record_last) if self.record_last else []
+        self.bests = deque(maxlen=self.record_last) if self.record_last else []
+        self.n_entries = 0
+        self.distinct = utils.DistinctCounter()
         self.iteration = 0
         self.aborted = False
         self.no_impr = 0
+        self.rng = np.random.default_rng(self.seed)
+        self.n_evaluations = 0
+        self.hits_start = cache.for_problem(self.problem).hits
+        self.stats = stats.Stats()
+        stats.activate(self.stats)
+        if self.profile:
+            interval = 0.005 if self.profile is True else self.profile
+            self.stats.profiler = stats.SamplingProfiler(interval).start()
         self.start = time.time()
+        self.criterion = self.termination_criterion()
+        self.criterion.start(self)
         return self
 
     def __next__(self):
+        state = self.__dict__.pop("resume_state", None)
+        if state is not None:
+            self.set_state(state)
+
+        stats.activate(self.stats)
         self.iteration += 1
         self.no_impr += 1
 
@@ -74,25 +134,37 @@ class Metaheuristic(abc.ABC):
 
         if self.has_improved:
             self.no_impr = 0
-            self.best_population = list(self.population)
+            self.best_population = self.population.copy()
+        self.update_stats()
 
-        self.aborted = self.no_impr == self.abort_iter * self.n_iters
-        if self.aborted or self.iteration >= self.n_iters:
+        if self.criterion(self):
+            self.aborted = isinstance(self.criterion.fired, termination.Stagnation)
             self.duration = time.time() - self.start
+            if self.stats.profiler is not None:
+                self.stats.profiler.stop()
+            if self.evaluator is not None:
+                self.evaluator.close()
             raise StopIteration
 
+        if self.checkpoint and self.iteration % self.checkpoint_every == 0:
+            self.save_checkpoint()
+
         return self.population, self.best_solution
 
     def __call__(self, *args, bar=None, **kwargs):
-        iterable = self if not bar else utils.bar(iterable)
+        iterable = self if not bar else utils.bar(self)
         for pop, best in iterable:
-            self.rep.append(list(pop))
-            self.bests.append(copy.copy(best))
-        self.cache_info = str(self.best_solution._cost.cache_info())
+            self.record_iteration(pop, best)
+        cost = self.best_solution._cost
+        if hasattr(cost, "cache_info"):
+            self.cache_info = str(cost.cache_info())
+        else:
+            self.cache_info = str(cache.for_problem(self.problem).info())
         return self
 
     def __getitem__(self, items):
-        return list(zip(self.rep[items], self.bests[items]))
+        rep = self.rep or [None] * len(self.bests)
+        return list(zip(rep, self.bests))[items]
 
     def __len__(self):
         return self.n_iters
@@ -117,6 +189,153 @@ class Metaheuristic(abc.ABC):
     def _run(self):
         ...
 
+    def termination_criterion(self):
+        """
+        Stop after `n_iters` iterations, after `abort_iter * n_iters`
+        iterations without improvement, or on any of `time_limit` (seconds),
+        `max_evaluations`, `target_cost` and the custom `termination`.
+        """
+        criteria = [
+            termination.MaxIterations(self.n_iters),
+            termination.Stagnation(self.abort_iter * self.n_iters),
+        ]
+        if self.time_limit is not None:
+            criteria.append(termination.TimeLimit(self.time_limit))
+        if self.max_evaluations is not None:
+            criteria.append(termination.MaxEvaluations(self.max_evaluations))
+        if self.target_cost is not None:
+            criteria.append(termination.TargetCost(self.target_cost))
+        if self.termination is not None:
+            criteria.append(self.termination)
+        return termination.Any(*criteria)
+
+    @property
+    def evaluations(self):
+        """
+        Cost evaluations of this run: candidate solutions scored, in full or
+        through `Problem.delta_cost`, whether or not a cache answered them.
+        """
+        return self.n_evaluations
+
+    def update_stats(self):
+        info = cache.for_problem(self.problem)
+        self.stats.counters["evaluations"] = self.evaluations
+        self.stats.counters["cache_hits"] = info.hits - self.hits_start
+
+    def get_state(self):
+        """
+        Minimal state needed to resume the run, without its history;
+        algorithms extend it with their own state.
+        """
+        return {
+            "name": self.name,
+            "iteration": self.iteration,
+            "no_impr": self.no_impr,
+            "n_entries": self.n_entries,
+            "evaluations": self.evaluations,
+            "elapsed": time.time() - self.start,
+            "distinct": self.distinct,
+            "population": checkpoint.dump_population(self.population),
+            "best_population": checkpoint.dump_population(self.best_population),
+            "rng": self.rng.bit_generator.state,
+            "random": random.getstate(),
+            "sampling": sampling.default_rng().bit_generator.state,
+        }
+
+    def set_state(self, state):
+        if state["name"] != self.name:
+            raise ValueError(f"Cannot resume a {state['name']} run as {self.name}")
+        self.iteration = state["iteration"]
+        self.no_impr = state["no_impr"]
+        self.n_entries = state["n_entries"]
+        self.n_evaluations = state["evaluations"]
+        self.hits_start = cache.for_problem(self.problem).hits
+        self.start = time.time() - state["elapsed"]
+        self.distinct = state["distinct"]
+        self.population = checkpoint.load_population(self.problem, state["population"])
+        self.best_population = checkpoint.load_population(
+            self.problem, state["best_population"]
+        )
+        self.rng.bit_generator.state = state["rng"]
+        random.setstate(state["random"])
+        sampling.default_rng().bit_generator.state = state["sampling"]
+
+    def save_checkpoint(self, path=None):
+        checkpoint.save(path or self.checkpoint, self.get_state())
+
+    def resume(self, path, bar=None):
+        """Continue the run saved in the checkpoint at `path`."""
+        self.resume_state = checkpoint.load(path)
+        return self(bar=bar)
+
+    def record_iteration(self, pop, best):
+        self.n_entries += len(pop)
+        if self.iteration % self.record_every:
+            return
+        if self.count_distinct:
+            if isinstance(pop, ArrayPopulation):
+                self.distinct.update(row.tobytes() for row in pop.sequences)
+            else:
+                self.distinct.update(pop)
+
+        if self.record == "none":
+            return
+        if self.record == "all":
+            self.rep.append(pop.copy())
+        self.bests.append(copy.copy(best))
+
+    def evaluate(self, solutions):
+        with self.stats.timer("evaluation"):
+            if isinstance(solutions, ArrayPopulation):
+                return solutions.evaluate(self.evaluator)
+            scalar = type(self.problem).evaluate_batch is abstract.Problem.evaluate_batch
+            if self.evaluator is None and scalar:
+                return np.array([s.cost for s in solutions], dtype=float)
+            if (
+                self.evaluator is not None
+                and not (scalar and self.evaluator.local)
+                and solutions
+                and not cache.is_cached(solutions[0])
+            ):
+                warnings.warn(
+                    f"{type(solutions[0]).__name__}._cost is not wrapped with "
+                    f"cache.cached: comparing solutions through Solution.cost "
+                    f"evaluates again the costs computed by {self.evaluator!r}"
+                )
+            return cache.evaluate_batch(
+                self.problem, [s.sequence for s in solutions], self.evaluator
+            )
+
+    def cost_of(self, solution):
+        """
+        Cost of `solution`, taken from the evaluation cache when a batch
+        already scored it (see `evaluate`), from `Solution.cost` otherwise.
+        """
+        evaluations = cache.for_problem(self.problem)
+        k = cache.key(self.problem, solution.sequence)
+        if k in evaluations:
+            return evaluations.get(k)
+        return solution.cost
+
+    @property
+    def delta_search(self):
+        return isinstance(self.search_operator, moves.MoveOperator)
+
+    def propose(self, current, size):
+        with self.stats.timer("variation"):
+            proposals = [self.search_operator.propose(current) for _ in range(size)]
+        with self.stats.timer("evaluation"):
+            deltas = [self.problem.delta_cost(current, move) for move in proposals]
+        self.n_evaluations += size
+        return proposals, current.cost + np.array(deltas, dtype=float)
+
+    def best_move(self, current, proposals, costs):
+        for i in np.argsort(costs, kind="stable"):
+            new = moves.apply(current, proposals[i])
+            if new is not None:
+                return new, costs[i]
+        return None, math.inf
+
     @property
     def config(self):
         return self.__config
@@ -130,44 +349,123 @@ class Metaheuristic(abc.ABC):
     @property
     def population(self):
         if not self.__population:
-            self.__population = [
+            self.population = [
                 self.problem.random_solution for _ in range(self.pop_size)
             ]
-            self.best_population = list(self.__population)
+            self.n_evaluations += self.pop_size
+            self.best_population = self.__population.copy()
         return self.__population
 
     @population.setter
     def population(self, value):
+        if (
+            self.population_backend == "array"
+            and value
+            and not isinstance(value, ArrayPopulation)
+        ):
+            value = ArrayPopulation.from_solutions(self.problem, value)
         self.__population = value
 
     @property
     def best_solution(self):
-        return min(self.best_population, default=None)
+        if isinstance(self.best_population, ArrayPopulation):
+            return self.best_population.best
+        return min(self.best_population, key=self.cost_of, default=None)
 
     @property
     def worst_solution(self):
-        return max(self.best_population, default=None)
+        if isinstance(self.best_population, ArrayPopulation):
+            return self.best_population.worst
+        return max(self.best_population, key=self.cost_of, default=None)
 
     @property
     def unique_solutions(self):
+        if self.record != "all":
+            raise ValueError(
+                f"unique_solutions needs record='all' (record={self.record!r}); "
+                "use n_unique with count_distinct=True"
+            )
         return {s for r in self.rep for s in r}
 
+    @property
+    def n_unique(self):
+        """
+        Distinct solutions seen in the recorded iterations (every
+        `record_every`); needs count_distinct=True.
+        """
+        if not self.count_distinct:
+            raise ValueError("n_unique needs count_distinct=True")
+        return len(self.distinct)
+
     @property
     def saturation(self):
+        if isinstance(self.population, ArrayPopulation):
+            return self.population.uniqueness()
         return utils.uniqueness(self.population)
 
     @property
     def has_improved(self):
-        return min(self.population) < self.best_solution
+        best = self.cost_of(self.best_solution)
+        return self.evaluate(self.population).min() < best
 
     @property
     def rate(self):
-        return sum([len(r) for r in self.rep]) / self.duration
+        return self.n_entries / self.duration
+
+    @property
+    def name(self):
+        return self.__class__.__name__
+
+    @property
+    def best_cost(self):
+        return self.cost_of(self.best_solution)
+
+    @property
+    def curve(self):
+        return [b.cost for b in self.bests]
 
     @property
     def plot(self):
-        utils.plot(self.bests)
-        utils.show()
+        utils.plot(self)
+        utils.plt.show()
+
+
+class PoolMixin:
+    """
+    Keeps a process pool alive for the whole run of a solver.
+
+    Each worker receives a copy of the solver once, when the pool starts; the
+    problem attributes listed in `shared_arrays` are copied to shared memory
+    first, so that workers attach to them instead of copying them.
+    """
+
+    shared_arrays = ()
+
+    def open_pool(self):
+        self.close_pool()
+        shared.share(self.problem, *self.shared_arrays)
+        self.pool = Pool(self.n_workers, init_worker, (self,))
+
+    def close_pool(self):
+        pool = self.__dict__.pop("pool", None)
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def chunksize(self, n):
+        return max(1, n // (4 * (self.n_workers or os.cpu_count())))
+
+    def __next__(self):
+        try:
+            return super().__next__()
+        except StopIteration:
+            self.close_pool()
+            raise
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("pool", None)
+        return state
 
 
 class Genetic(Metaheuristic):
@@ -178,29 +476,112 @@ class Genetic(Metaheuristic):
         kwargs.setdefault("search_operator", utils.pitch)
         super().__init__(problem, *args, **kwargs)
 
+    @property
+    def batch_crossover(self):
+        return crossover.is_batch(self.crossover)
+
+    def cross(self, p1, p2):
+        if self.batch_crossover:
+            return self.crossover(p1, p2, rng=self.rng)
+        return self.crossover(p1, p2)
+
+    def repair(self, sequence):
+        """
+        `sequence` made feasible with the problem's `constraints`, if any (see
+        `moves.Constraints.repair`); unchanged when it cannot be.
+        """
+        constraints = self.problem.constraints
+        if constraints is None:
+            return sequence
+        repaired = constraints.repair(list(sequence))
+        if repaired is None:
+            return sequence
+        self.stats.count("repairs", repaired != list(sequence))
+        return repaired
+
+    def offspring(self, p1, p2):
+        o1, o2 = self.cross(p1, p2)
+        o1 = self.problem.solution(sequence=self.repair(o1))
+        o2 = self.problem.solution(sequence=self.repair(o2))
+        return o1, o2
+
     def mate(self, p1, p2):
-        o1, o2 = self.crossover(p1, p2)
-        o1 = self.problem.solution(sequence=o1)
-        o2 = self.problem.solution(sequence=o2)
+        """
+        Cross `p1` and `p2`, repairing the children with the problem's
+        constraints, until both are correct, at most `max_retries` more
+        times; then the parents are kept.
+        """
+        o1, o2 = self.offspring(p1, p2)
 
         if random.random() < self.prob_mutation:
             o1 = self.search_operator(o1)
             o2 = self.search_operator(o2)
 
-        while not all((o1.correct, o2.correct)):
-            o1, o2 = self.crossover(p1, p2)
-            o1 = self.problem.solution(sequence=o1)
-            o2 = self.problem.solution(sequence=o2)
-        return o1, o2
+        for retry in range(self.max_retries + 1):
+            if retry:
+                o1, o2 = self.offspring(p1, p2)
+            self.stats.count("feasibility_checks")
+            if o1.correct and o2.correct:
+                self.stats.count("repair_retries", retry)
+                return o1, o2
+        self.stats.count("repair_retries", self.max_retries)
+        self.stats.count("repair_failures")
+        return copy.copy(p1), copy.copy(p2)
+
+    def mate_batch(self, parents1, parents2):
+        """
+        Mate every row of the parent matrices at once with a batch crossover,
+        repairing the children as `mate` does; pairs with an incorrect child
+        are crossed again, at most `max_retries` times, then the parents are
+        kept.
+        """
+        children = [None] * (2 * len(parents1))
+        todo = np.arange(len(parents1))
+        mutate = self.rng.random(len(parents1)) < self.prob_mutation
+        for _ in range(self.max_retries + 1):
+            if not todo.size:
+                break
+            o1, o2 = self.cross(parents1[todo], parents2[todo])
+            retry = []
+            for k, i in enumerate(todo.tolist()):
+                c = self.problem.solution(sequence=self.repair(o1[k].tolist()))
+                d = self.problem.solution(sequence=self.repair(o2[k].tolist()))
+                if mutate[i]:
+                    c, d = self.search_operator(c), self.search_operator(d)
+                    mutate[i] = False
+                if c.correct and d.correct:
+                    children[2 * i], children[2 * i + 1] = c, d
+                else:
+                    retry.append(i)
+            self.stats.count("feasibility_checks", len(todo))
+            self.stats.count("repair_retries", len(retry))
+            todo = np.array(retry, dtype=int)
+        self.stats.count("repair_failures", len(todo))
+        for i in todo.tolist():
+            children[2 * i] = self.problem.solution(sequence=parents1[i].tolist())
+            children[2 * i + 1] = self.problem.solution(sequence=parents2[i].tolist())
+        return children
 
     def _run(self):
         pop = []
-        mating_pool = utils.roulette_wheel(self.population)
-        for i, j in utils.pairwise(mating_pool, step=2):
-            a = self.population[i]
-            b = self.population[j]
-            c, d = self.mate(a, b)
-            pop.extend([c, d])
+        costs = self.evaluate(self.population)
+        with self.stats.timer("selection"):
+            mating_pool = utils.roulette_wheel(costs, rng=self.rng)
+        with self.stats.timer("variation"):
+            if self.batch_crossover:
+                pairs = np.array(mating_pool[: len(mating_pool) // 2 * 2]).reshape(-1, 2)
+                if isinstance(self.population, ArrayPopulation):
+                    sequences = self.population.sequences
+                else:
+                    sequences = np.array([s.sequence for s in self.population])
+                pop = self.mate_batch(sequences[pairs[:, 0]], sequences[pairs[:, 1]])
+            else:
+                for i, j in utils.pairwise(mating_pool, step=2):
+                    a = self.population[i]
+                    b = self.population[j]
+                    c, d = self.mate(a, b)
+                    pop.extend([c, d])
+        self.n_evaluations += len(pop)
         return pop
 
 
@@ -213,93 +594,264 @@ class SimulatedAnnealing(Metaheuristic):
 
     def __init__(self, problem, *args, **kwargs):
         kwargs.setdefault("neighborhood_size", 2 * problem.difficulty)
+        kwargs.setdefault("calibration_samples", 500)
+        kwargs.setdefault("calibration_cache", None)
         super().__init__(problem, *args, **kwargs)
+        if self.calibration_samples < 2:
+            raise ValueError(
+                f"calibration_samples must be at least 2, got {self.calibration_samples}"
+            )
+
+    @property
+    def calibration_key(self):
+        """
+        Key of the cached temperatures: the problem, the search operator with
+        its parameters (partial arguments, closure cells) and the walk's
+        settings; None, i.e. no caching, for lambdas, which cannot be told
+        apart.
+        """
+
+        def name(op):
+            if isinstance(op, partial):
+                return (name(op.func), op.args, sorted(op.keywords.items()))
+            qualname = getattr(op, "__qualname__", None)
+            if qualname is None:
+                return repr(op)
+            if "<lambda>" in qualname:
+                raise ValueError(f"Anonymous operator {qualname}")
+            cells = [cell.cell_contents for cell in op.__closure__ or ()]
+            return (
+                op.__module__,
+                qualname,
+                [name(cell) if callable(cell) else cell for cell in cells],
+            )
+
+        try:
+            operator = name(self.search_operator)
+        except ValueError:
+            return None
+        return repr(
+            (
+                hash(self.problem),
+                operator,
+                self.startprob,
+                self.endprob,
+                self.calibration_samples,
+                self.neighborhood_size,
+            )
+        )
 
     def calibrate(self):
+        """
+        Set the initial and final temperatures from a descending walk of
+        `calibration_samples` neighbors, drawn and evaluated in batches of
+        `neighborhood_size`.
+
+        Temperatures are cached per problem and operator (see
+        `calibration_key`) in memory and, if `calibration_cache` is a path, on
+        disk: later runs on the same instance skip the walk.
+        """
+        key = self.calibration_key
+        if key is None:
+            self.ti, self.tf = self.random_walk()
+        else:
+            if key not in _calibrations and self.calibration_cache:
+                if os.path.exists(self.calibration_cache):
+                    _calibrations.update(checkpoint.load(self.calibration_cache))
+
+            if key not in _calibrations:
+                _calibrations[key] = self.random_walk()
+                if self.calibration_cache:
+                    stored = {}
+                    if os.path.exists(self.calibration_cache):
+                        stored = checkpoint.load(self.calibration_cache)
+                    stored[key] = _calibrations[key]
+                    checkpoint.save(self.calibration_cache, stored)
+
+            self.ti, self.tf = _calibrations[key]
+        self.dt = (self.ti - self.tf) / self.n_iters
 
+    def random_walk(self):
         current = self.problem.random_solution
-        pop = [current]
+        current_cost = current.cost
+        self.n_evaluations += 1
+        costs = [current_cost]
         deltas = []
-        for _ in range(self.n_iters):
-            new = self.search_operator(current)
-            pop.append(new)
-
-            worst = new > current
-            if worst:
-                deltas.append(new - current)
+        batch = max(1, self.neighborhood_size)
+        while len(costs) <= self.calibration_samples:
+            if self.delta_search:
+                proposals, batch_costs = self.propose(current, batch)
             else:
-                current = new
-
-        mu = statistics.mean(deltas)
-        sigma = statistics.stdev(i.cost for i in pop)
-        self.ti = -mu / math.log(self.startprob)
-        self.tf = -sigma / math.log(self.endprob)
-        self.dt = (self.ti - self.tf) / self.n_iters
+                proposals = [self.search_operator(current) for _ in range(batch)]
+                batch_costs = self.evaluate(proposals)
+                self.n_evaluations += batch
+            costs.extend(batch_costs.tolist())
+            deltas.extend((batch_costs[batch_costs > current_cost] - current_cost).tolist())
+
+            i = batch_costs.argmin()
+            if batch_costs[i] <= current_cost:
+                new = proposals[i]
+                if self.delta_search:
+                    new = moves.apply(current, new)
+                if new is not None:
+                    current, current_cost = new, batch_costs[i]
+
+        # The spread is measured once the walk has left the random start,
+        # as the long walks this replaces did.
+        sigma = statistics.stdev(costs[len(costs) // 2 :])
+        mu = statistics.mean(deltas) if deltas else sigma
+        return -mu / math.log(self.startprob), -sigma / math.log(self.endprob)
 
     def __iter__(self):
+        super().__iter__()
         self.calibrate()
-        return super().__iter__()
+        return self
+
+    def get_state(self):
+        state = super().get_state()
+        state.update(ti=self.ti, tf=self.tf, dt=self.dt)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.ti, self.tf, self.dt = state["ti"], state["tf"], state["dt"]
 
     @property
     def temp(self):
         return self.ti - self.dt * self.iteration
 
-    def accept(self, sol):
-        delta = self.best_solution - sol
+    def accept(self, sol, cost=None):
+        cost = self.cost_of(sol) if cost is None else cost
+        delta = self.cost_of(self.best_solution) - cost
         return random.random() < math.exp(delta / self.temp)
 
     def _run(self):
         pop = self.population
         current = pop[0]
 
-        neighborhood = []
-        for _ in range(self.neighborhood_size):
-            new = self.search_operator(current)
-
-            if new < self.best_solution:
-                return [new]
-
-            neighborhood.append(new)
-            if self.recursive:
-                current = new
-
-        best_neighbor = min(neighborhood)
+        if self.delta_search and not self.recursive:
+            proposals, costs = self.propose(current, self.neighborhood_size)
+            with self.stats.timer("selection"):
+                best_neighbor, cost = self.best_move(current, proposals, costs)
+            with self.stats.timer("replacement"):
+                if best_neighbor is not None and (
+                    cost < self.cost_of(self.best_solution)
+                    or self.accept(best_neighbor, cost)
+                ):
+                    return [best_neighbor]
+            return pop
 
-        return [best_neighbor] if self.accept(best_neighbor) else pop
+        neighborhood = []
+        with self.stats.timer("variation"):
+            for _ in range(self.neighborhood_size):
+                new = self.search_operator(current)
+                neighborhood.append(new)
+                if self.recursive:
+                    current = new
+
+        costs = self.evaluate(neighborhood)
+        self.n_evaluations += len(neighborhood)
+        with self.stats.timer("selection"):
+            i = costs.argmin()
+            best_neighbor = neighborhood[i]
+
+        with self.stats.timer("replacement"):
+            if costs[i] < self.cost_of(self.best_solution) or self.accept(
+                best_neighbor, costs[i]
+            ):
+                return [best_neighbor]
+        return pop
 
 
 class TabuSearch(Metaheuristic):
+    """
+    Tabu memory is either the last `tabu_list_length` solutions
+    (tabu_memory="solutions") or the attributes of the moves made in the last
+    `tabu_tenure` iterations (tabu_memory="attributes", see `tabu`).
+    With `aspiration`, a tabu neighbor better than the best so far is allowed.
+    """
 
     pop_size = 1
 
     def __init__(self, problem, *args, **kwargs):
         kwargs.setdefault("neighborhood_size", 2 * problem.difficulty)
         kwargs.setdefault("tabu_list_length", 4 * problem.difficulty)
-        self.tabu_list = []
+        kwargs.setdefault("tabu_memory", "solutions")
+        kwargs.setdefault("tabu_attribute", "values")
+        kwargs.setdefault("tabu_tenure", kwargs["tabu_list_length"])
+        kwargs.setdefault("aspiration", True)
         super().__init__(problem, *args, **kwargs)
 
+    def __iter__(self):
+        super().__iter__()
+        if self.tabu_memory == "solutions":
+            self.tabu_list = tabu.SolutionTabu(self.tabu_list_length)
+        elif self.tabu_memory == "attributes":
+            self.tabu_list = tabu.AttributeTabu(self.tabu_tenure, self.tabu_attribute)
+        else:
+            raise ValueError(f"Unknown tabu memory {self.tabu_memory!r}")
+        return self
+
+    def get_state(self):
+        state = super().get_state()
+        state["tabu_list"] = self.tabu_list
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.tabu_list = state["tabu_list"]
+
+    def allowed(self, current, new, cost=None, move=None):
+        if not self.tabu_list.is_tabu(current, new, move):
+            return True
+        if self.aspiration:
+            cost = self.cost_of(new) if cost is None else cost
+            return cost < self.cost_of(self.best_solution)
+        return False
+
     def _run(self):
         pop = self.population
         current = pop[0]
+        self.tabu_list.step()
 
-        neighborhood = []
-        for _ in range(self.neighborhood_size):
-            new = self.search_operator(current)
+        if self.delta_search:
+            return self._run_moves(current) or pop
 
-            if new not in self.tabu_list:
-                neighborhood.append(new)
+        with self.stats.timer("variation"):
+            neighborhood = [
+                self.search_operator(current) for _ in range(self.neighborhood_size)
+            ]
+            if not self.aspiration:
+                neighborhood = [new for new in neighborhood if self.allowed(current, new)]
 
         if neighborhood:
-            best_neighbor = min(neighborhood)
-            self.tabu_list.append(best_neighbor)
-            if len(self.tabu_list) > self.tabu_list_length:
-                self.tabu_list.pop(0)
-
-            if best_neighbor < current:
-                return [best_neighbor]
+            costs = self.evaluate(neighborhood)
+            self.n_evaluations += len(neighborhood)
+            with self.stats.timer("replacement"):
+                for i in np.argsort(costs, kind="stable"):
+                    best_neighbor = neighborhood[i]
+                    if self.aspiration and not self.allowed(
+                        current, best_neighbor, costs[i]
+                    ):
+                        continue
+                    self.tabu_list.add(current, best_neighbor)
+                    if costs[i] < self.cost_of(current):
+                        return [best_neighbor]
+                    break
 
         return pop
 
+    def _run_moves(self, current):
+        proposals, costs = self.propose(current, self.neighborhood_size)
+        with self.stats.timer("selection"):
+            for i in np.argsort(costs, kind="stable"):
+                new = moves.apply(current, proposals[i])
+                if new is not None and self.allowed(current, new, costs[i], proposals[i]):
+                    self.tabu_list.add(current, new, proposals[i])
+                    if costs[i] < self.cost_of(current):
+                        return [new]
+                    break
+
 
 class HarmonySearch(Metaheuristic):
 
@@ -309,42 +861,99 @@ class HarmonySearch(Metaheuristic):
         kwargs.setdefault("pop_size", problem.difficulty)
         super().__init__(problem, *args, **kwargs)
 
-    def harmony_memory_consideration(self):
-        harmony_memory = self.population
+    def __iter__(self):
+        super().__iter__()
+        self.selection = None
+        return self
 
-        new_harmony = []
-        end = len(harmony_memory[0])
-        start = random.randint(0, end - 1)
+    def set_state(self, state):
+        super().set_state(state)
+        self.selection = None
+
+    @property
+    def selection_distribution(self):
+        """
+        Notes and selection logits of the harmony memory, computed once and
+        kept until the memory changes.
+        """
+        if self.selection is None:
+            harmony_memory = self.population
+            if isinstance(harmony_memory, ArrayPopulation):
+                notes = harmony_memory.sequences.copy()
+            else:
+                notes = np.array([h.sequence for h in harmony_memory])
+            logits = np.array(self.evaluate(harmony_memory), dtype=float)
+            self.selection = notes, logits
+        return self.selection
+
+    def compose_harmony(self):
+        notes, logits = self.selection_distribution
+        constraints = self.problem.constraints
+
+        end = notes.shape[1]
+        if constraints is not None and constraints.predecessors:
+            # Left to right, so that predecessors are placed first.
+            start = 0
+        else:
+            start = random.randint(0, end - 1)
         seq = list(range(start, end)) + list(range(0, start))
+        order = sampling.gumbel_top_k(
+            np.broadcast_to(logits, (end, len(logits))), len(logits), self.rng
+        )
+
+        new_harmony = [None] * end
+        used = set()
+
+        def admits(note, pos):
+            return note not in used and (
+                constraints is None or constraints.admits(note, pos, used)
+            )
 
         for pos in seq:
-            rw = utils.roulette_wheel(harmony_memory)
-            notes = [harmony_memory[i][pos] for i in rw]
-            notes = [n for n in notes if n not in new_harmony]
-            if notes:
-                note = notes[0]
+            for note in notes[order[pos], pos].tolist():
+                if admits(note, pos):
+                    break
             else:
-                poss = list(set(range(end)) - set(new_harmony))
-                note = random.choice(poss)
-            new_harmony.append(note)
+                free = [n for n in set(range(end)) - used if admits(n, pos)]
+                note = random.choice(free or list(set(range(end)) - used))
+            new_harmony[pos] = note
+            used.add(note)
 
-        new_harmony = new_harmony[start:] + new_harmony[:start]
-        new_harmony = self.problem.solution(sequence=new_harmony)
+        return self.problem.solution(sequence=new_harmony)
 
-        while not new_harmony.correct:
-            new_harmony = self.harmony_memory_consideration()
-
-        return new_harmony
+    def harmony_memory_consideration(self):
+        """
+        Compose harmonies until one is correct, at most `max_retries` more
+        times; then a copy of a random member of the memory is returned.
+        """
+        for retry in range(self.max_retries + 1):
+            new_harmony = self.compose_harmony()
+            self.stats.count("feasibility_checks")
+            if new_harmony.correct:
+                self.stats.count("repair_retries", retry)
+                return new_harmony
+        self.stats.count("repair_retries", self.max_retries)
+        self.stats.count("repair_failures")
+        return copy.copy(random.choice(self.population))
 
     def _run(self):
 
         harmony_memory = self.population
-        new_harmony = self.harmony_memory_consideration()
+        with self.stats.timer("selection"):
+            new_harmony = self.harmony_memory_consideration()
 
-        if random.random() < self.par:
-            new_harmony = self.search_operator(new_harmony)
-        if new_harmony < self.worst_solution:
-            harmony_memory[utils.argmax(harmony_memory)] = new_harmony
+        with self.stats.timer("variation"):
+            if random.random() < self.par:
+                new_harmony = self.search_operator(new_harmony)
+        cost = self.evaluate([new_harmony])[0]
+        self.n_evaluations += 1
+        with self.stats.timer("replacement"):
+            notes, logits = self.selection_distribution
+            worst = int(logits.argmax())
+            if cost < logits[worst]:
+                harmony_memory[worst] = new_harmony
+                notes[worst] = new_harmony.sequence
+                logits[worst] = cost
 
         return harmony_memory
 
@@ -379,6 +988,7 @@ class ModifiedHarmonySearch(Genetic, HarmonySearch):
 
         if random.random() < self.lprr:
             pop = self.large_portion_recovery()
+            self.selection = None
         else:
             pop = HarmonySearch._run(self)
 
@@ -405,7 +1015,9 @@ class ModifiedHarmonySearch_v2(ModifiedHarmonySearch):
         n_copies = len(self.population) - n_uniques
         repeat = round(n_copies / n_uniques) or 1
 
-        roulette_wheel = chain(utils.roulette_wheel(mating_pool) * repeat)
+        roulette_wheel = chain(
+            utils.roulette_wheel(self.evaluate(mating_pool), rng=self.rng) * repeat
+        )
 
         children = []
         for i, j in utils.pairwise(roulette_wheel, step=2):
@@ -413,6 +1025,7 @@ class ModifiedHarmonySearch_v2(ModifiedHarmonySearch):
             b = mating_pool[j]
             c, d = self.mate(a, b)
             children.extend([c, d])
+        self.n_evaluations += len(children)
 
         #  indici delle copie nell'hm
         idx = [n for n, x in enumerate(self.population) if x in self.population[:n]]
@@ -441,37 +1054,69 @@ class CuckooSearch(Metaheuristic):
 
     def fly(self, sol):
 
+        if self.delta_search:
+            return self._fly_moves(sol)
+
         flight = []
         current = copy.copy(sol)
+        with self.stats.timer("variation"):
+            for _ in range(self.levy_lenght):
+                new = self.search_operator(current)  #  utils.pitch(current)
+                if self.real_flight:
+                    current = new
+                flight.append(new)
+
+        costs = self.evaluate(flight)
+        self.n_evaluations += len(flight)
+        if self.abort_flight:
+            improving = np.flatnonzero(costs < sol.cost)
+            if improving.size:
+                return flight[improving[0]]
+        return flight[costs.argmin()]
+
+    def _fly_moves(self, sol):
+        best, best_cost = sol, math.inf
+        current, cost = sol, sol.cost
         for _ in range(self.levy_lenght):
-            new = self.search_operator(current)  #  utils.pitch(current)
+            with self.stats.timer("variation"):
+                move = self.search_operator.propose(current)
+                new = moves.apply(current, move)
+            if new is None:
+                continue
+            with self.stats.timer("evaluation"):
+                new_cost = cost + self.problem.delta_cost(current, move)
+            self.n_evaluations += 1
+            if self.abort_flight and new_cost < sol.cost:
+                return new
+            if new_cost < best_cost:
+                best, best_cost = new, new_cost
             if self.real_flight:
-                current = new
-            if self.abort_flight and new < sol:
-                return [new]
-            flight.append(new)
-        return flight
+                current, cost = new, new_cost
+        return best
 
     def _run(self):
 
         pop = self.population
 
-        which_cuckoo = utils.roulette_wheel(pop, size=1)[0]
+        costs = self.evaluate(pop)
+        with self.stats.timer("selection"):
+            which_cuckoo = utils.roulette_wheel(costs, size=1, rng=self.rng)[0]
         cuckoo = pop[which_cuckoo]
-        flight = self.fly(cuckoo)
-        new = min(flight)
+        new = self.fly(cuckoo)
 
-        if new < cuckoo:
-            pop[which_cuckoo] = new
-        else:
-            i = random.randint(0, len(self.population) - 1)
-            random_cuckoo = pop[i]
-            if new < random_cuckoo:
-                pop[i] = new
+        with self.stats.timer("replacement"):
+            if new < cuckoo:
+                pop[which_cuckoo] = new
+            else:
+                i = random.randint(0, len(self.population) - 1)
+                random_cuckoo = pop[i]
+                if new < random_cuckoo:
+                    pop[i] = new
 
-        split = int(self.p_rgn * len(self.population))
-        for i in range(split, len(self.population)):
-            pop[i] = self.problem.random_solution
+            split = int(self.p_rgn * len(self.population))
+            for i in range(split, len(self.population)):
+                pop[i] = self.problem.random_solution
+            self.n_evaluations += max(0, len(self.population) - split)
 
         return pop
 
@@ -486,10 +1131,23 @@ class ModifiedCuckooSearch(CuckooSearch, SimulatedAnnealing):
 
     def __iter__(self):
         self = super().__iter__()
-        self.starting_points = copy.deepcopy(self.population)
+        self.starting_points = self.population.copy()
         self.useless_attempts = [0] * len(self.population)
         return self
 
+    def get_state(self):
+        state = super().get_state()
+        state["starting_points"] = checkpoint.dump_population(self.starting_points)
+        state["useless_attempts"] = list(self.useless_attempts)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.starting_points = checkpoint.load_population(
+            self.problem, state["starting_points"]
+        )
+        self.useless_attempts = list(state["useless_attempts"])
+
     def _run(self):
 
         pop = self.population
@@ -502,57 +1160,83 @@ class ModifiedCuckooSearch(CuckooSearch, SimulatedAnnealing):
                 idx = -split + i
                 pop[idx] = copy.copy(new)
                 self.starting_points[idx] = copy.copy(new)
+            self.n_evaluations += len(bests)
 
-        if sum(self.useless_attempts) == 0:
-            which_cuckoo = random.randint(0, len(pop) - 1)
-        else:
-            which_cuckoo = utils.roulette_wheel(self.useless_attempts, size=1)[0]
+        with self.stats.timer("selection"):
+            if sum(self.useless_attempts) == 0:
+                which_cuckoo = random.randint(0, len(pop) - 1)
+            else:
+                which_cuckoo = utils.roulette_wheel(
+                    self.useless_attempts, size=1, rng=self.rng)[0]
         cuckoo = self.starting_points[which_cuckoo]
-        flight = self.fly(cuckoo)
-        new = min(flight)
+        new = self.fly(cuckoo)
         self.useless_attempts[which_cuckoo] += 1
 
-        if new < pop[which_cuckoo]:
-            pop[which_cuckoo] = new
-            self.starting_points[which_cuckoo] = new
-            self.useless_attempts[which_cuckoo] = 0
-        elif self.accept(new):
-            self.starting_points[which_cuckoo] = new
+        with self.stats.timer("replacement"):
+            if new < pop[which_cuckoo]:
+                pop[which_cuckoo] = new
+                self.starting_points[which_cuckoo] = new
+                self.useless_attempts[which_cuckoo] = 0
+            elif self.accept(new):
+                self.starting_points[which_cuckoo] = new
 
         return pop
 
 
 class Exaustive(Metaheuristic):
+    """
+    Exact branch and bound over the permutations of `search_space`, sharded
+    over `n_workers` processes; it runs in-process inside daemonic processes,
+    e.g. in a parallel `Race`.
+    """
+
     def __init__(self, problem, *args, **kwargs):
+        kwargs.setdefault("elements", None)
+        kwargs.setdefault("n_workers", os.cpu_count())
+        kwargs.setdefault("upper_bound", math.inf)
         super().__init__(problem, *args, **kwargs)
 
+    @property
+    def search_space(self):
+        if self.elements is not None:
+            return list(self.elements)
+        if hasattr(self.problem, "n_jobs"):
+            return list(range(self.problem.n_jobs + self.problem.n_maintenance))
+        return sorted(self.problem.random_solution.sequence)
+
+    @property
+    def evaluations(self):
+        return self.n_entries
+
+    def solve(self):
+        return exact.branch_and_bound(
+            self.problem, self.search_space, self.n_workers, self.upper_bound
+        )
+
     def __call__(self):
 
         self.start = time.time()
-        self.rep = []
-
-        j = self.problem.n_jobs
-        m = self.problem.n_maintenance
-        all_sequences = permutations(range(j + m))
-        sequence = next(all_sequences)
-        best = self.problem.solution(sequence=sequence)
-        while not best.correct:
-            sequence = next(all_sequences)
-            best = self.problem.solution(sequence=sequence)
-
-        self.rep.append(best)
-        for sequence in all_sequences:
-            new = self.problem.solution(sequence=sequence)
-            if new.correct and new < best:
-                best = new
-                self.rep.append(best)
+        self.iteration = 1
 
+        result = self.solve()
+        self.n_entries = result.evaluated
+        self.n_pruned = result.pruned
+        if result.sequence is None:
+            raise ValueError("No correct solution beats the upper bound")
+
+        best = self.problem.solution(sequence=result.sequence)
+        self.rep = [best]
+        self.bests = [best]
         self.population = [best]
         self.best_population = [best]
 
         self.duration = time.time() - self.start
         self.cache_info = ""
         self.aborted = False
+        self.stats = stats.Stats()
+        self.stats.count("evaluations", self.n_entries)
+        self.stats.count("pruned", self.n_pruned)
+        self.stats.timers["search"] = self.duration
 
         return self
 
@@ -560,19 +1244,66 @@ class Exaustive(Metaheuristic):
         ...
 
 
+class DynamicProgramming(Exaustive):
+    """
+    Exact Held-Karp solver for path-like problems, on `problem.distance_matrix`
+    or, failing that, on `problem.pairwise_cost(a, b)`.
+
+    `nbytes` tells the memory the run needs; runs needing more than
+    `max_bytes` are refused with a MemoryError before allocating anything.
+    """
+
+    def __init__(self, problem, *args, **kwargs):
+        kwargs.setdefault("depot", None)
+        kwargs.setdefault("closed", False)
+        kwargs.setdefault("max_bytes", 2 ** 30)
+        super().__init__(problem, *args, **kwargs)
+
+    @property
+    def nbytes(self):
+        n = len(self.search_space) - (self.closed and self.depot is None)
+        return exact.held_karp_nbytes(n)
+
+    @property
+    def cost_matrix(self):
+        matrix = getattr(self.problem, "distance_matrix", None)
+        if matrix is not None:
+            return matrix
+        nodes = self.search_space + ([] if self.depot is None else [self.depot])
+        size = max(nodes) + 1
+        matrix = np.zeros((size, size))
+        for a in nodes:
+            for b in nodes:
+                if a != b:
+                    matrix[a, b] = self.problem.pairwise_cost(a, b)
+        return matrix
+
+    def solve(self):
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            raise MemoryError(
+                f"{self.name} needs {self.nbytes} bytes (max_bytes={self.max_bytes})"
+            )
+        return exact.held_karp(
+            self.cost_matrix, self.search_space, self.depot, self.closed
+        )
+
+
 class TSPParticleSwarmOptimization(Metaheuristic):
 
     def __init__(self, problem, *args, **kwargs):
         kwargs.setdefault("pop_size", problem.difficulty)
         kwargs.setdefault("weights", [1., 1., 1.])
         kwargs.setdefault('n_groups', kwargs['pop_size'] // 5)
+        kwargs.setdefault("prob_mutation", 0.2)
+        kwargs.setdefault("n_candidates", 15)
         super().__init__(problem, *args, **kwargs)
 
     def __iter__(self):
         self = super().__iter__()
 
-        self.p_bests = copy.deepcopy(self.population)
-        self.g_best = min(self.population)
+        self.p_bests = self.population.copy()
+        costs = self.evaluate(self.population)
+        self.g_best = self.population[int(costs.argmin())]
         
         self.particle_to_group = {particle: random.randint(0, self.n_groups - 1) for particle in range(self.pop_size)}
         self.group_to_particles = defaultdict(list)
@@ -581,36 +1312,62 @@ class TSPParticleSwarmOptimization(Metaheuristic):
 
         self.g_bests = {}
         for group, particles in self.group_to_particles.items():
-            self.g_bests[group] = min(self.population[particle_idx] for particle_idx in particles)
+            best = min(particles, key=costs.__getitem__)
+            self.g_bests[group] = self.population[best]
 
         return self
 
+    def get_state(self):
+        state = super().get_state()
+        state["p_bests"] = [checkpoint.dump_solution(s) for s in self.p_bests]
+        state["g_best"] = checkpoint.dump_solution(self.g_best)
+        state["g_bests"] = {
+            group: checkpoint.dump_solution(s) for group, s in self.g_bests.items()
+        }
+        state["particle_to_group"] = self.particle_to_group
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.p_bests = [checkpoint.load_solution(self.problem, s) for s in state["p_bests"]]
+        self.g_best = checkpoint.load_solution(self.problem, state["g_best"])
+        self.g_bests = {
+            group: checkpoint.load_solution(self.problem, s)
+            for group, s in state["g_bests"].items()
+        }
+        self.particle_to_group = dict(state["particle_to_group"])
+        self.group_to_particles = defaultdict(list)
+        for particle, group in self.particle_to_group.items():
+            self.group_to_particles[group].append(particle)
+
     def move(self, i, particle, p_best):
+        g_best = self.g_bests[self.particle_to_group[i]]
+        return self.step(particle, p_best, g_best)
+
+    def step(self, particle, p_best, g_best):
 
         dists = self.problem.distance_matrix
 
         new = copy.copy(particle)
         new_seq = []
+        visited = set()
+        members = set(particle.sequence)
 
         current_node = 0
-        g_best = self.g_bests[self.particle_to_group[i]]
         for nodes in zip(particle, p_best, g_best):
+            previous_node = current_node
             weighted_dists = tuple(weight / dists[current_node][node] for weight, node in zip(self.weights, nodes))
-            candidates_idxs = utils.roulette_wheel(weighted_dists)
+            candidates_idxs = utils.roulette_wheel(weighted_dists, rng=self.rng)
             
             for idx in candidates_idxs:
                 current_node = nodes[idx]
-                if current_node not in new_seq:
+                if current_node not in visited:
                     break
             else:
-                while True:
-                    current_node = random.choice(
-                        random.choice((particle, p_best, g_best)))
-                    
-                    if current_node not in new_seq:
-                        break
+                current_node = self.nearest_unvisited(previous_node, members, visited)
 
             new_seq.append(current_node)
+            visited.add(current_node)
 
         new.sequence = new_seq
         if random.random() < self.prob_mutation:
@@ -618,196 +1375,679 @@ class TSPParticleSwarmOptimization(Metaheuristic):
 
         return new
 
-    def _run(self):
-        particles = self.population
+    def nearest_unvisited(self, node, members, visited):
+        if self.n_candidates:
+            for candidate in utils.candidate_lists(self.problem, self.n_candidates)[node]:
+                if candidate in members and candidate not in visited:
+                    return int(candidate)
+        return random.choice(tuple(members - visited))
+
+    def update_bests(self, i, new, cost):
+        group = self.particle_to_group[i]
 
-        for i, (particle, p_best) in enumerate(zip(particles, self.p_bests)):
-            new = self.move(i, particle, p_best)
+        if cost < self.cost_of(self.p_bests[i]):
+            self.p_bests[i] = new
+
+        if cost < self.cost_of(self.g_bests[group]):
+            self.g_bests[group] = new
 
-            particles[i] = new
+        if cost < self.cost_of(self.g_best):
+            self.g_best = new
 
-            if new < p_best:
-                self.p_bests[i] = new
+    def _run(self):
+        particles = self.population
 
-            if new < self.g_bests[self.particle_to_group[i]]:
-                self.g_bests[self.particle_to_group[i]] = new
+        with self.stats.timer("variation"):
+            moved = [
+                self.move(i, particle, p_best)
+                for i, (particle, p_best) in enumerate(zip(particles, self.p_bests))
+            ]
+        costs = self.evaluate(moved)
+        self.n_evaluations += len(moved)
 
-            if new < self.g_best:
-                self.g_best = new
+        with self.stats.timer("replacement"):
+            for i, (new, cost) in enumerate(zip(moved, costs)):
+                particles[i] = new
+                self.update_bests(i, new, cost)
 
         return particles
 
 
-class TSPParticleSwarmOptimizationParallel(Metaheuristic):
+def _pso_step(sequences):
+    particle, p_best, g_best = (
+        _worker_solver.problem.solution(sequence=s) for s in sequences
+    )
+    new = _worker_solver.step(particle, p_best, g_best)
+    return new.sequence, new.cost
+
+
+class TSPParticleSwarmOptimizationParallel(PoolMixin, TSPParticleSwarmOptimization):
+    """
+    Particles move in parallel, on a pool of `n_workers` processes that lives
+    for the whole run; personal, group and global bests are merged in the
+    parent after each generation.
+    """
 
     def __init__(self, problem, *args, **kwargs):
-        kwargs.setdefault("pop_size", problem.difficulty)
-        kwargs.setdefault("weights", [1., 1., 1.])
-        kwargs.setdefault('n_groups', kwargs['pop_size'] // 5)
+        kwargs.setdefault("n_workers", os.cpu_count())
+        kwargs.setdefault("shared_arrays", ("distance_matrix",))
         super().__init__(problem, *args, **kwargs)
 
     def __iter__(self):
         self = super().__iter__()
-
-        self.p_bests = copy.deepcopy(self.population)
-        self.g_best = min(self.population)
-        
-        self.particle_to_group = {particle: random.randint(0, self.n_groups - 1) for particle in range(self.pop_size)}
-        self.group_to_particles = defaultdict(list)
-        for particle, group in self.particle_to_group.items():
-            self.group_to_particles[group].append(particle)
-
-        self.g_bests = {}
-        for group, particles in self.group_to_particles.items():
-            self.g_bests[group] = min(self.population[particle_idx] for particle_idx in particles)
-
+        self.open_pool()
         return self
 
-    def move(self, t):
-
-        i, particle, p_best = t
-
-        dists = self.problem.distance_matrix
-
-        new = copy.copy(particle)
-        new_seq = []
+    def _run(self):
+        particles = self.population
 
-        current_node = 0
-        g_best = self.g_bests[self.particle_to_group[i]]
-        for nodes in zip(particle, p_best, g_best):
-            weighted_dists = tuple(weight / dists[current_node][node] for weight, node in zip(self.weights, nodes))
-            candidates_idxs = utils.roulette_wheel(weighted_dists)
-            
-            for idx in candidates_idxs:
-                current_node = nodes[idx]
-                if current_node not in new_seq:
-                    break
-            else:
-                while True:
-                    current_node = random.choice(
-                        random.choice((particle, p_best, g_best)))
-                    
-                    if current_node not in new_seq:
-                        break
+        todo = [
+            (
+                particle.sequence,
+                p_best.sequence,
+                self.g_bests[self.particle_to_group[i]].sequence,
+            )
+            for i, (particle, p_best) in enumerate(zip(particles, self.p_bests))
+        ]
+        with self.stats.timer("variation"):
+            moved = self.pool.map(_pso_step, todo, self.chunksize(len(todo)))
+        self.n_evaluations += len(moved)
+
+        evaluations = cache.for_problem(self.problem)
+        with self.stats.timer("replacement"):
+            for i, (sequence, cost) in enumerate(moved):
+                evaluations.put(cache.key(self.problem, sequence), cost)
+                new = self.problem.solution(sequence=sequence)
+                particles[i] = new
+                self.update_bests(i, new, cost)
 
-            new_seq.append(current_node)
+        return particles
 
-        new.sequence = new_seq
-        if random.random() < self.prob_mutation:
-            new = self.search_operator(new)
 
-        # controllare che vada bene qui
-        if new < p_best:
-            self.p_bests[i] = new
+class AntColonyOptimization(Metaheuristic):
 
-        if new < self.g_bests[self.particle_to_group[i]]:
-            self.g_bests[self.particle_to_group[i]] = new
+    def __init__(self, problem, *args, **kwargs):
+        kwargs.setdefault('pop_size', 1)
+        kwargs.setdefault('q', 2.0)
+        kwargs.setdefault('ro', 0.9)
+        kwargs.setdefault('alpha', 1.0)
+        kwargs.setdefault('beta', 5.0)
+        kwargs.setdefault('pher_init', 0.1)
+        kwargs.setdefault('always_evaporate', False)
+        kwargs.setdefault('n_candidates', 15)
+        super().__init__(problem, *args, **kwargs)
 
-        if new < self.g_best:
-            self.g_best = new
-        
-        return new
+    def __iter__(self):
+        self = super().__iter__()
+        self.distance_matrix = np.asarray(self.problem.distance_matrix, dtype=float)
+        self.nodes = np.array(self.problem.random_solution.sequence)
+
+        n = len(self.distance_matrix)
+        self.allowed = np.zeros(n, dtype=bool)
+        self.allowed[self.nodes] = True
+        self.pheromons = np.zeros((n, n))
+        self.pheromons[np.ix_(np.append(self.nodes, 0), self.nodes)] = self.pher_init
+        with np.errstate(divide='ignore'):
+            self.heuristic = np.where(
+                self.distance_matrix > 0, self.distance_matrix, np.inf) ** -self.beta
+        self.candidates = (
+            utils.candidate_lists(self.problem, self.n_candidates)
+            if self.n_candidates else None)
+        return self
 
-    # def _run(self):
-    #     particles = self.population
+    def get_state(self):
+        state = super().get_state()
+        state["pheromons"] = self.pheromons
+        return state
 
-    #     for i, (particle, p_best) in enumerate(zip(particles, self.p_bests)):
-    #         new = self.move(i, particle, p_best)
+    def set_state(self, state):
+        super().set_state(state)
+        self.pheromons = np.array(state["pheromons"])
 
-    #         particles[i] = new
+    def choose(self, current_node, nodes, draw):
+        probs = self.pheromons[current_node, nodes] ** self.alpha * self.heuristic[current_node, nodes]
+        cumulative = np.cumsum(probs)
+        if cumulative[-1] > 0:
+            idx = np.searchsorted(cumulative, draw * cumulative[-1], side='right')
+        else:
+            idx = int(draw * len(nodes))
+        return int(nodes[idx])
 
-    #         if new < p_best:
-    #             self.p_bests[i] = new
+    def move(self):
+        allowed = self.allowed.copy()
+        new_seq = []
 
-    #         if new < self.g_bests[self.particle_to_group[i]]:
-    #             self.g_bests[self.particle_to_group[i]] = new
+        current_node = 0
+        for draw in self.rng.random(len(self.nodes)):
+            nodes = None
+            if self.candidates is not None:
+                nodes = self.candidates[current_node]
+                nodes = nodes[allowed[nodes]]
+            if nodes is None or not nodes.size:
+                nodes = np.flatnonzero(allowed)
+            current_node = self.choose(current_node, nodes, draw)
+            allowed[current_node] = False
+            new_seq.append(current_node)
 
-    #         if new < self.g_best:
-    #             self.g_best = new
+        return self.problem.solution(sequence=new_seq)
 
-    #     return particles
+    def evaporate_pheromons(self):
+        self.pheromons *= self.ro
 
+    def add_pheromons(self, solution):
+        seq = np.asarray(solution.sequence)
+        node_a, node_b = seq[:-1], seq[1:]
+        np.add.at(
+            self.pheromons, (node_a, node_b), self.q / self.distance_matrix[node_a, node_b])
 
     def _run(self):
-        particles = self.population
-        
-        new_particles = []
-
-        todo = [(i, particle, p_best) for i, (particle, p_best) in enumerate(zip(particles, self.p_bests))]
+        pop = self.population
+        with self.stats.timer("variation"):
+            ants = [self.move() for _ in range(len(pop))]
+        costs = self.evaluate(ants)
+        self.n_evaluations += len(ants)
+        best = costs.argmin()
+
+        with self.stats.timer("replacement"):
+            if self.always_evaporate:
+                self.evaporate_pheromons()
+
+            if costs[best] < self.best_solution.cost:
+                self.evaporate_pheromons()
+                self.add_pheromons(ants[best])
+
+        return ants
+
+
+def _worker_process(conn, solver, epoch):
+    """
+    Worker process of a `WorkerProcessesMixin` driver: `solver` runs without
+    stopping criteria, driven by (command, payload) messages. "epoch" sends
+    back `epoch(solver, payload)`, "get_state" the solver's state and
+    "set_state" restores it; None stops the worker.
+    """
+    solver.n_iters = math.inf
+    solver.time_limit = solver.max_evaluations = None
+    solver.target_cost = solver.termination = solver.checkpoint = None
+    solver.profile = None
+    iter(solver)
+    init_worker(solver)
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        command, payload = message
+        if command == "epoch":
+            conn.send(epoch(solver, payload))
+        elif command == "get_state":
+            conn.send(solver.get_state())
+        elif command == "set_state":
+            solver.set_state(payload)
+    conn.close()
+
+
+class WorkerProcessesMixin:
+    """
+    Keeps one process per worker solver alive for the whole run of a driver
+    (see `IslandModel`, `ParallelTempering`); only sequences and costs cross
+    process boundaries, and the problem attributes listed in `shared_arrays`
+    are copied to shared memory first.
+
+    Checkpoints include the workers' states, so that a resume restarts every
+    worker where it was.
+
+    Drivers cannot run inside daemonic processes, which cannot start
+    children: they only race serially (see `Race`).
+    """
+
+    shared_arrays = ()
+
+    def open_workers(self, solvers, epoch):
+        self.close_workers()
+        shared.share(self.problem, *self.shared_arrays)
+        self.workers = []
+        for solver in solvers:
+            parent, child = Pipe()
+            process = Process(
+                target=_worker_process, args=(child, solver, epoch), daemon=True
+            )
+            process.start()
+            child.close()
+            self.workers.append((process, parent))
+
+    def close_workers(self):
+        for process, conn in self.__dict__.pop("workers", []):
+            conn.send(None)
+            conn.close()
+            process.join()
+
+    def run_epoch(self, messages):
+        for (_, conn), message in zip(self.workers, messages):
+            conn.send(("epoch", message))
+        return [conn.recv() for _, conn in self.workers]
+
+    def get_state(self):
+        state = super().get_state()
+        for _, conn in self.workers:
+            conn.send(("get_state", None))
+        state["workers"] = [conn.recv() for _, conn in self.workers]
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        for (_, conn), worker in zip(self.workers, state["workers"]):
+            conn.send(("set_state", worker))
 
-        with Pool(6) as pool:
-            multiple_results = pool.map_async(
-                self.move, todo, callback=new_particles.extend)
-            multiple_results.wait()
+    def __next__(self):
+        try:
+            return super().__next__()
+        except StopIteration:
+            self.close_workers()
+            raise
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("workers", None)
+        return state
+
+
+def _island_epoch(solver, message):
+    """
+    Take immigrants in, run `interval` iterations, send emigrants and the
+    best solution out as plain sequences.
+    """
+    immigrants, n_migrants, interval = message
+
+    pop = solver.population
+    if immigrants:
+        worst = np.argsort(-solver.evaluate(pop), kind="stable")
+        for i, sequence in zip(worst, immigrants):
+            pop[int(i)] = solver.problem.solution(sequence=sequence.tolist())
+        if hasattr(solver, "selection"):
+            solver.selection = None
+
+    for _ in range(interval):
+        next(solver)
+
+    pop = solver.population
+    costs = solver.evaluate(pop)
+    top = np.argsort(costs, kind="stable")[:n_migrants]
+    emigrants = [(np.asarray(pop[int(i)].sequence), float(costs[i])) for i in top]
+    best = solver.best_solution
+    return emigrants, np.asarray(best.sequence), best.cost, solver.evaluations
+
+
+class IslandModel(WorkerProcessesMixin, Metaheuristic):
+    """
+    Island model: copies of the `island` solver (a Genetic by default) evolve
+    in `n_islands` processes. Every `migration_interval` generations, each
+    island sends its `n_migrants` best members to its neighbours in the
+    `topology` ("ring", "full" or "random"), which replace their worst members
+    with the best migrants they receive.
+
+    One iteration of the model is one such epoch; the population is made of
+    the islands' best solutions. Islands run as in `WorkerProcessesMixin`.
+    """
+
+    topologies = ("ring", "full", "random")
 
-        multiple_results.get()
+    def __init__(self, problem, *args, **kwargs):
+        kwargs.setdefault("island", None)
+        kwargs.setdefault("n_islands", os.cpu_count())
+        kwargs.setdefault("migration_interval", 10)
+        kwargs.setdefault("n_migrants", 2)
+        kwargs.setdefault("topology", "ring")
+        kwargs.setdefault("shared_arrays", ("distance_matrix",))
+        kwargs.setdefault(
+            "n_iters", 5000 * problem.difficulty // kwargs["migration_interval"]
+        )
+        super().__init__(problem, *args, **kwargs)
+        if self.island is None:
+            self.island = Genetic(problem)
+        if self.topology not in self.topologies:
+            raise ValueError(f"Unknown topology {self.topology!r}")
+        self.pop_size = self.n_islands
 
-        particles = new_particles
+    def __iter__(self):
+        self = super().__iter__()
+        self.best_population = self.population.copy()
+        self.open_workers([self.island] * self.n_islands, _island_epoch)
+        self.inboxes = [[] for _ in range(self.n_islands)]
+        self.island_evaluations = [0] * self.n_islands
+        return self
 
-        return particles
+    def get_state(self):
+        state = super().get_state()
+        state.update(inboxes=self.inboxes, island_evaluations=self.island_evaluations)
+        return state
 
+    def set_state(self, state):
+        super().set_state(state)
+        self.inboxes = state["inboxes"]
+        self.island_evaluations = list(state["island_evaluations"])
 
-class AntColonyOptimization(Metaheuristic):
+    @property
+    def evaluations(self):
+        return sum(self.island_evaluations)
+
+    def neighbours(self, i):
+        n = self.n_islands
+        if n == 1:
+            return []
+        if self.topology == "ring":
+            return [(i + 1) % n]
+        if self.topology == "full":
+            return [j for j in range(n) if j != i]
+        return [(i + int(self.rng.integers(1, n))) % n]
 
-    pop_size = 1
+    def _run(self):
+        with self.stats.timer("migration"):
+            messages = []
+            for inbox in self.inboxes:
+                inbox.sort(key=lambda migrant: migrant[1])
+                immigrants = [sequence for sequence, _ in inbox[: self.n_migrants]]
+                messages.append((immigrants, self.n_migrants, self.migration_interval))
+            results = self.run_epoch(messages)
+
+        self.inboxes = [[] for _ in range(self.n_islands)]
+        evaluations = cache.for_problem(self.problem)
+        bests = []
+        for i, (emigrants, sequence, cost, n) in enumerate(results):
+            self.island_evaluations[i] = n
+            for j in self.neighbours(i):
+                self.inboxes[j].extend(emigrants)
+            sequence = sequence.tolist()
+            evaluations.put(cache.key(self.problem, sequence), cost)
+            bests.append(self.problem.solution(sequence=sequence))
+        return bests
+
+
+def _chain_epoch(solver, message):
+    """
+    Run `interval` iterations of the annealing `solver` at the constant
+    `temperature`, restarting from the (sequence, cost) received, if any;
+    send the current and best solutions out as plain sequences.
+    """
+    restart, temperature, interval = message
+    solver.ti, solver.dt = temperature, 0.0
+    if restart:
+        sequence, cost = restart
+        sequence = sequence.tolist()
+        cache.for_problem(solver.problem).put(cache.key(solver.problem, sequence), cost)
+        solver.population = [solver.problem.solution(sequence=sequence)]
+
+    for _ in range(interval):
+        next(solver)
+
+    current = solver.population[0]
+    best = solver.best_solution
+    return (
+        np.asarray(current.sequence),
+        current.cost,
+        np.asarray(best.sequence),
+        best.cost,
+        solver.evaluations,
+    )
+
+
+class ParallelTempering(WorkerProcessesMixin, Metaheuristic):
+    """
+    Parallel tempering: copies of the annealing `chain` solver (a
+    SimulatedAnnealing by default) run at a ladder of constant `temperatures`
+    in `n_chains` processes, with the chain's own `search_operator` and
+    `accept`. Every `exchange_interval` iterations, the parent proposes to
+    swap the current solutions of neighbouring temperatures (even and odd
+    pairs alternately), accepting with the Metropolis criterion.
+
+    The default ladder is geometric between the chain's calibrated final and
+    initial temperatures. One iteration is one such epoch; the population is
+    made of the chains' best solutions, coldest first. Chains run as in
+    `WorkerProcessesMixin`.
+    """
 
     def __init__(self, problem, *args, **kwargs):
-        kwargs.setdefault('q', 2.0)
-        kwargs.setdefault('ro', 0.9)
-        kwargs.setdefault('alpha', 1.0)
-        kwargs.setdefault('beta', 5.0)
-        kwargs.setdefault('pher_init', 0.1)
-        kwargs.setdefault('always_evaporate', False)
+        kwargs.setdefault("chain", None)
+        kwargs.setdefault("n_chains", os.cpu_count())
+        kwargs.setdefault("exchange_interval", 10)
+        kwargs.setdefault("temperatures", None)
+        kwargs.setdefault("shared_arrays", ("distance_matrix",))
+        kwargs.setdefault(
+            "n_iters", 5000 * problem.difficulty // kwargs["exchange_interval"]
+        )
         super().__init__(problem, *args, **kwargs)
+        if self.chain is None:
+            self.chain = SimulatedAnnealing(problem)
+        if self.temperatures is not None:
+            self.n_chains = len(self.temperatures)
+        self.pop_size = self.n_chains
 
     def __iter__(self):
         self = super().__iter__()
-        self.distance_matrix = self.problem.distance_matrix
-        self.pheromons = defaultdict(lambda: defaultdict(lambda: 0))
-        for node_a in self.problem.random_solution.sequence + [0]:
-            for node_b in self.problem.random_solution:
-                self.pheromons[node_a][node_b] = self.pher_init
+        self.best_population = self.population.copy()
+        self.ladder = self.temperature_ladder()
+        self.open_workers([self.chain] * self.n_chains, _chain_epoch)
+        self.states = [None] * self.n_chains
+        self.outbox = [()] * self.n_chains
+        self.chain_evaluations = [0] * self.n_chains
         return self
 
-    def move(self, current):
-        dists = self.problem.distance_matrix
-
-        new = self.problem.random_solution
-        new_seq = []
+    def get_state(self):
+        state = super().get_state()
+        state.update(
+            ladder=self.ladder,
+            states=self.states,
+            outbox=self.outbox,
+            chain_evaluations=self.chain_evaluations,
+        )
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.ladder = list(state["ladder"])
+        self.states = list(state["states"])
+        self.outbox = list(state["outbox"])
+        self.chain_evaluations = list(state["chain_evaluations"])
+
+    def temperature_ladder(self):
+        if self.temperatures is not None:
+            return sorted(self.temperatures)
+        chain = copy.copy(self.chain)
+        chain.stats = self.stats
+        chain.calibrate()
+        lo, hi = sorted((abs(chain.tf), abs(chain.ti)))
+        lo = lo or hi / 100
+        return np.geomspace(lo, hi, self.n_chains).tolist()
 
-        current_node = 0
-        while len(new_seq) != len(new.sequence):
-            probs = {
-                node: (pher ** self.alpha) / (self.distance_matrix[current_node][node] ** self.beta)
-                if node not in new_seq else 0
-                for node, pher in self.pheromons[current_node].items()
-            }
-            current_node = random.choices(
-                tuple(probs.keys()),
-                weights=tuple(probs.values()), k=1)[0]
-            new_seq.append(current_node)
+    @property
+    def evaluations(self):
+        return sum(self.chain_evaluations)
+
+    def exchange(self):
+        for i in range(self.iteration % 2, self.n_chains - 1, 2):
+            j = i + 1
+            (_, cost_i), (_, cost_j) = self.states[i], self.states[j]
+            delta = (1 / self.ladder[i] - 1 / self.ladder[j]) * (cost_i - cost_j)
+            self.stats.count("exchange_attempts")
+            if delta >= 0 or self.rng.random() < math.exp(delta):
+                self.stats.count("exchanges")
+                self.states[i], self.states[j] = self.states[j], self.states[i]
+                self.outbox[i] = self.states[i]
+                self.outbox[j] = self.states[j]
 
-        new.sequence = new_seq
-        return new
+    def _run(self):
+        with self.stats.timer("exchange"):
+            results = self.run_epoch(
+                [
+                    (restart, temperature, self.exchange_interval)
+                    for restart, temperature in zip(self.outbox, self.ladder)
+                ]
+            )
+        self.outbox = [()] * self.n_chains
+
+        evaluations = cache.for_problem(self.problem)
+        bests = []
+        for i, (current, current_cost, sequence, cost, n) in enumerate(results):
+            self.chain_evaluations[i] = n
+            self.states[i] = (current, current_cost)
+            sequence = sequence.tolist()
+            evaluations.put(cache.key(self.problem, sequence), cost)
+            bests.append(self.problem.solution(sequence=sequence))
+
+        with self.stats.timer("exchange"):
+            self.exchange()
+        return bests
+
+
+class LockstepSearch(Metaheuristic):
+    """
+    `n_chains` independent local searches advanced in lockstep on one core:
+    the current solutions are a K x n matrix with a cost vector, each
+    iteration draws `neighborhood_size` neighbors per chain with the array
+    operator `array_operator` (e.g. `utils.pitch_batch`, `utils.tweak_batch`)
+    and scores all of them in one `Problem.evaluate_batch` call (or one call
+    of `evaluator`), bypassing the evaluation cache. When the problem exposes
+    its `constraints`, they are passed on to the operator as `constraints=`.
+
+    With mode="annealing" every chain follows `SimulatedAnnealing`: its best
+    neighbor is accepted if it beats the chain's best, or with the Metropolis
+    probability at a linearly decreasing temperature. With mode="tabu" every
+    chain follows `TabuSearch` with a memory of its last `tabu_list_length`
+    solutions.
+    """
+
+    modes = ("annealing", "tabu")
+    startprob = 0.1
+    endprob = 0.02
 
-    def evaporate_pheromons(self):
-        for phers in self.pheromons.values():
-            for node in phers:
-                phers[node] *= self.ro
+    def __init__(self, problem, *args, **kwargs):
+        kwargs.setdefault("n_chains", 32)
+        kwargs.setdefault("mode", "annealing")
+        kwargs.setdefault("array_operator", utils.pitch_batch)
+        kwargs.setdefault("neighborhood_size", 2 * problem.difficulty)
+        kwargs.setdefault("tabu_list_length", 4 * problem.difficulty)
+        kwargs.setdefault("aspiration", True)
+        kwargs["population_backend"] = "array"
+        super().__init__(problem, *args, **kwargs)
+        if self.mode not in self.modes:
+            raise ValueError(f"Unknown mode {self.mode!r}")
+        self.pop_size = self.n_chains
 
-    def add_pheromons(self, solution):
-        for node_a, node_b in utils.pairwise(solution):
-            self.pheromons[node_a][node_b] += self.q / self.distance_matrix[node_a][node_b]
+    def __iter__(self):
+        super().__iter__()
+        pop = self.population
+        # Initial costs come from one batch call below, not one per solution.
+        self.n_evaluations = 0
+        self.current = pop.sequences.copy()
+        pop.costs[:] = self.current_costs = self.batch_cost(self.current)
+        self.best_population = pop.copy()
+        self.chain_bests = self.current_costs.copy()
+        self.calibrate()
+        if self.mode == "tabu":
+            k, n = self.current.shape
+            self.tabu = np.zeros((k, self.tabu_list_length, n), dtype=self.current.dtype)
+            self.tabu_filled = np.zeros((k, self.tabu_list_length), dtype=bool)
+            self.tabu_next = 0
+        return self
 
-    def _run(self):
-        current = self.population[0]
-        new = self.move(current)
+    def get_state(self):
+        state = super().get_state()
+        state.update(
+            chain_bests=self.chain_bests, ti=self.ti, tf=self.tf, dt=self.dt,
+        )
+        if self.mode == "tabu":
+            state.update(
+                tabu=self.tabu, tabu_filled=self.tabu_filled, tabu_next=self.tabu_next
+            )
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.current = self.population.sequences.copy()
+        self.current_costs = self.population.costs.copy()
+        self.chain_bests = np.array(state["chain_bests"])
+        self.ti, self.tf, self.dt = state["ti"], state["tf"], state["dt"]
+        if self.mode == "tabu":
+            self.tabu = np.array(state["tabu"])
+            self.tabu_filled = np.array(state["tabu_filled"])
+            self.tabu_next = state["tabu_next"]
+
+    def batch_cost(self, sequences):
+        with self.stats.timer("evaluation"):
+            self.n_evaluations += len(sequences)
+            if self.evaluator is not None:
+                return self.evaluator(self.problem, sequences)
+            return np.asarray(self.problem.evaluate_batch(sequences), dtype=float)
+
+    def neighbors(self):
+        k, n = self.current.shape
+        constraints = self.problem.constraints
+        options = {} if constraints is None else {"constraints": constraints}
+        with self.stats.timer("variation"):
+            candidates = self.array_operator(
+                np.repeat(self.current, self.neighborhood_size, axis=0),
+                self.rng,
+                **options,
+            )
+        costs = self.batch_cost(candidates)
+        shape = (k, self.neighborhood_size)
+        return candidates.reshape(shape + (n,)), costs.reshape(shape)
 
-        if self.always_evaporate:
-            self.evaporate_pheromons()
+    def calibrate(self):
+        """
+        Temperatures accepting the mean worsening move of a first round of
+        neighborhoods with probability `startprob`, then `endprob`.
+        """
+        _, costs = self.neighbors()
+        deltas = costs - self.current_costs[:, None]
+        worse = deltas[deltas > 0]
+        mu = worse.mean() if worse.size else 1.0
+        self.ti = -mu / math.log(self.startprob)
+        self.tf = -mu / math.log(self.endprob)
+        self.dt = (self.ti - self.tf) / self.n_iters
 
-        if new < self.best_solution:
-            self.evaporate_pheromons()
-            self.add_pheromons(new)
+    @property
+    def temp(self):
+        return self.ti - self.dt * self.iteration
 
-        return [new]
+    def _run(self):
+        candidates, costs = self.neighbors()
+        rows = np.arange(len(self.current))
+
+        if self.mode == "tabu":
+            with self.stats.timer("selection"):
+                tabu = (
+                    (candidates[:, :, None] == self.tabu[:, None]).all(-1)
+                    & self.tabu_filled[:, None]
+                ).any(-1)
+                if self.aspiration:
+                    tabu &= costs >= self.best_solution.cost
+                costs = np.where(tabu, np.inf, costs)
+                best = costs.argmin(1)
+                cost = costs[rows, best]
+                new = candidates[rows, best]
+
+            with self.stats.timer("replacement"):
+                found = np.isfinite(cost)
+                self.tabu[found, self.tabu_next] = new[found]
+                self.tabu_filled[found, self.tabu_next] = True
+                self.tabu_next = (self.tabu_next + 1) % self.tabu_list_length
+                accept = found & (cost < self.current_costs)
+        else:
+            with self.stats.timer("selection"):
+                best = costs.argmin(1)
+                cost = costs[rows, best]
+                new = candidates[rows, best]
+
+            with self.stats.timer("replacement"):
+                delta = np.minimum(self.chain_bests - cost, 0.0)
+                accept = (cost < self.chain_bests) | (
+                    self.rng.random(len(rows)) < np.exp(delta / self.temp)
+                )
+
+        with self.stats.timer("replacement"):
+            self.current[accept] = new[accept]
+            self.current_costs[accept] = cost[accept]
+            self.chain_bests = np.minimum(self.chain_bests, self.current_costs)
+            self.stats.count("accepted", int(accept.sum()))
+        return ArrayPopulation(self.problem, self.current, self.current_costs)
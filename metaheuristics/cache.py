@@ -0,0 +1,244 @@
+import functools
+import hashlib
+import sys
+import threading
+
+from collections import OrderedDict, defaultdict, namedtuple
+
+import numpy as np
+
+from metaheuristics import abstract
+
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "currsize", "maxsize", "nbytes"]
+)
+
+
+def key(problem, sequence):
+    """Canonical key of `sequence` for `problem`: a 16-byte digest."""
+    arr = np.ascontiguousarray(sequence)
+    digest = hashlib.blake2b(arr.tobytes(), digest_size=16)
+    digest.update(f"{hash(problem)}:{arr.dtype.str}:{arr.shape}".encode())
+    return digest.digest()
+
+
+class EvaluationCache:
+    """
+    Bounded cost cache keyed on sequences.
+
+    Evicts the least recently (policy="lru") or least frequently
+    (policy="lfu") used entry once `maxsize` entries or `maxbytes` bytes
+    are exceeded.
+    """
+
+    def __init__(self, maxsize=2 ** 20, maxbytes=None, policy="lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy {policy!r}")
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.policy = policy
+        self.lock = threading.RLock()
+        self.clear()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.info()})"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def __contains__(self, k):
+        return k in self.data
+
+    def clear(self):
+        self.data = OrderedDict()
+        self.freqs = {}
+        self.buckets = defaultdict(OrderedDict)
+        self.min_freq = 0
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            len(self.data),
+            self.maxsize,
+            self.nbytes,
+        )
+
+    def size(self, k, value):
+        return sys.getsizeof(k) + sys.getsizeof(value)
+
+    def touch(self, k):
+        if self.policy == "lru":
+            self.data.move_to_end(k)
+            return
+        freq = self.freqs[k]
+        del self.buckets[freq][k]
+        if not self.buckets[freq]:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.freqs[k] = freq + 1
+        self.buckets[freq + 1][k] = None
+
+    def get(self, k, default=None):
+        with self.lock:
+            try:
+                value = self.data[k]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.touch(k)
+            return value
+
+    def put(self, k, value):
+        with self.lock:
+            if k in self.data:
+                self.data[k] = value
+                self.touch(k)
+                return
+            self.data[k] = value
+            self.nbytes += self.size(k, value)
+            if self.policy == "lfu":
+                self.freqs[k] = 1
+                self.buckets[1][k] = None
+                self.min_freq = 1
+            while len(self.data) > 1 and self.full:
+                self.evict()
+
+    @property
+    def full(self):
+        return (self.maxsize is not None and len(self.data) > self.maxsize) or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes
+        )
+
+    def evict(self):
+        if self.policy == "lru":
+            k, value = self.data.popitem(last=False)
+        else:
+            while not self.buckets.get(self.min_freq):
+                self.min_freq += 1
+            k, _ = self.buckets[self.min_freq].popitem(last=False)
+            if not self.buckets[self.min_freq]:
+                del self.buckets[self.min_freq]
+            del self.freqs[k]
+            value = self.data.pop(k)
+        self.nbytes -= self.size(k, value)
+        self.evictions += 1
+
+
+class SharedEvaluationCache(EvaluationCache):
+    """
+    Evaluation cache backed by a `multiprocessing.Manager` dict, so that
+    solvers running in different processes reuse each other's evaluations.
+
+    The local bounded cache sits in front of the shared store, which stops
+    accepting new entries once it holds `shared_maxsize` of them.
+    """
+
+    def __init__(self, store, *args, shared_maxsize=2 ** 20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+        self.shared_maxsize = shared_maxsize
+
+    def get(self, k, default=None):
+        with self.lock:
+            value = self.data.get(k)
+            if value is None:
+                value = self.store.get(k)
+                if value is None:
+                    self.misses += 1
+                    return default
+                super().put(k, value)
+            else:
+                self.touch(k)
+            self.hits += 1
+            return value
+
+    def put(self, k, value):
+        super().put(k, value)
+        if len(self.store) < self.shared_maxsize:
+            self.store[k] = value
+
+
+default = EvaluationCache()
+
+
+def for_problem(problem):
+    cache = getattr(problem, "cache", None)
+    return default if cache is None else cache
+
+
+def evaluate_batch(problem, sequences, evaluator=None):
+    """
+    Costs of `sequences` as a NumPy vector, looked up in the problem's cache;
+    the misses are scored in one `Problem.evaluate_batch` call (or one call
+    of `evaluator`, see `evaluators`) and cached.
+    """
+    if type(problem).evaluate_batch is abstract.Problem.evaluate_batch:
+        # Costs go through `Solution.cost`, hence this cache, unless they are
+        # computed in other processes.
+        if evaluator is None:
+            return problem.evaluate_batch(sequences)
+        if evaluator.local:
+            return evaluator(problem, sequences)
+
+    evaluations = for_problem(problem)
+    keys = [key(problem, s) for s in sequences]
+    costs = np.array([evaluations.get(k, np.nan) for k in keys], dtype=float)
+    missing = np.flatnonzero(np.isnan(costs))
+    if missing.size:
+        batch = [sequences[i] for i in missing]
+        costs[missing] = (
+            problem.evaluate_batch(batch) if evaluator is None else evaluator(problem, batch)
+        )
+        for i in missing:
+            evaluations.put(keys[i], float(costs[i]))
+    return costs
+
+
+def cached(func):
+    """
+    Cache a `Solution._cost` method, in place of `functools.lru_cache`.
+
+    Costs are stored in `problem.cache` if the problem has one, in the
+    module-level `default` cache otherwise.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self):
+        cache = for_problem(self.problem)
+        k = key(self.problem, self.sequence)
+        value = cache.get(k)
+        if value is None:
+            value = func(self)
+            cache.put(k, value)
+        return value
+
+    wrapper.cached = True
+    return wrapper
+
+
+def is_cached(solution):
+    """Whether the `_cost` of `solution` is wrapped with `cached`."""
+    return getattr(type(solution)._cost, "cached", False)
+
+
+def install(cache):
+    global default
+    default = cache
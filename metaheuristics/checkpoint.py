@@ -0,0 +1,48 @@
+import os
+import pickle
+import tempfile
+
+from metaheuristics.population import ArrayPopulation
+
+
+def save(path, state):
+    """
+    Write `state` to `path` atomically: readers see either the previous
+    checkpoint or the new one, never a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def dump_solution(solution):
+    return None if solution is None else list(solution.sequence)
+
+
+def load_solution(problem, sequence):
+    return None if sequence is None else problem.solution(sequence=list(sequence))
+
+
+def dump_population(population):
+    if isinstance(population, ArrayPopulation):
+        return ("array", population.sequences, population.costs, population.valid)
+    return ("list", [dump_solution(s) for s in population])
+
+
+def load_population(problem, data):
+    if data[0] == "array":
+        return ArrayPopulation(problem, *data[1:])
+    return [load_solution(problem, s) for s in data[1]]
@@ -0,0 +1,252 @@
+import functools
+
+import numpy as np
+
+from metaheuristics import sampling
+
+
+def batch(func):
+    """
+    Mark `func(parents1, parents2, rng=None)` as a batch crossover working on
+    (pairs x n) parent matrices.
+
+    Called with a single pair (sequences or solutions), it returns a pair of
+    lists, like the crossovers in `utils`.
+    """
+
+    @functools.wraps(func)
+    def wrapper(p1, p2, *args, rng=None, **kwargs):
+        p1 = np.asarray(getattr(p1, "sequence", p1))
+        p2 = np.asarray(getattr(p2, "sequence", p2))
+        rng = rng or sampling.default_rng()
+        if p1.ndim == 1:
+            o1, o2 = func(p1[None], p2[None], *args, rng=rng, **kwargs)
+            return o1[0].tolist(), o2[0].tolist()
+        return func(p1, p2, *args, rng=rng, **kwargs)
+
+    wrapper.batch = True
+    return wrapper
+
+
+def is_batch(crossover):
+    while isinstance(crossover, functools.partial):
+        crossover = crossover.func
+    return getattr(crossover, "batch", False)
+
+
+def permutation(func):
+    """
+    Run a permutation crossover on codes 0..n-1, whatever the values of
+    the parents (all rows must be permutations of the same values).
+    """
+
+    @functools.wraps(func)
+    def wrapper(p1, p2, *args, **kwargs):
+        values = np.sort(p1[0])
+        if np.array_equal(values, np.arange(len(values))):
+            return func(p1, p2, *args, **kwargs)
+        o1, o2 = func(
+            np.searchsorted(values, p1), np.searchsorted(values, p2), *args, **kwargs
+        )
+        return values[o1], values[o2]
+
+    return wrapper
+
+
+def cut_points(shape, rng):
+    """Two cut points per pair, 0 <= a < b <= n."""
+    pairs, n = shape
+    a = rng.integers(0, n, size=pairs)
+    b = rng.integers(a + 1, n + 1)
+    return a, b
+
+
+def segment(shape, a, b):
+    pos = np.arange(shape[1])
+    return (pos >= a[:, None]) & (pos < b[:, None])
+
+
+def inverse(p):
+    """Position of every value in every row of `p`."""
+    rows = np.arange(len(p))[:, None]
+    inv = np.empty_like(p)
+    inv[rows, p] = np.arange(p.shape[1])
+    return inv
+
+
+def _ox(p1, p2, a, b, inside):
+    pairs, n = p1.shape
+    rows = np.arange(pairs)[:, None]
+    pos = np.arange(n)
+
+    taken = np.zeros(p1.shape, dtype=bool)
+    taken[rows, p1] = inside
+    start = (pos + b[:, None]) % n
+    donor = p2[rows, start]
+    keep = ~taken[rows, donor]
+    fill = pos < (n - (b - a))[:, None]
+
+    child = np.where(inside, p1, 0)
+    child[np.nonzero(fill)[0], start[fill]] = donor[keep]
+    return child
+
+
+@batch
+@permutation
+def order_crossover(p1, p2, rng=None):
+    """
+    OX: each child keeps a segment of one parent and takes the other genes in
+    the order of the other parent, starting after the second cut.
+    """
+    a, b = cut_points(p1.shape, rng)
+    inside = segment(p1.shape, a, b)
+    return _ox(p1, p2, a, b, inside), _ox(p2, p1, a, b, inside)
+
+
+def _pmx(p1, p2, inside):
+    rows = np.arange(len(p1))[:, None]
+    inv1 = inverse(p1)
+    taken = np.zeros(p1.shape, dtype=bool)
+    taken[rows, p1] = inside
+
+    child = np.where(inside, p1, p2)
+    for _ in range(p1.shape[1]):
+        clash = ~inside & taken[rows, child]
+        if not clash.any():
+            break
+        mapped = p2[rows, inv1[rows, child]]
+        child[clash] = mapped[clash]
+    return child
+
+
+@batch
+@permutation
+def partially_mapped_crossover(p1, p2, rng=None):
+    """
+    PMX: each child keeps a segment of one parent; genes of the other parent
+    that clash with it are replaced through the segment's mapping.
+    """
+    a, b = cut_points(p1.shape, rng)
+    inside = segment(p1.shape, a, b)
+    return _pmx(p1, p2, inside), _pmx(p2, p1, inside)
+
+
+@batch
+@permutation
+def cycle_crossover(p1, p2, rng=None):
+    """
+    CX: positions are split in the cycles of the mapping p1 -> p2; children
+    take the cycles alternately from each parent.
+    """
+    rows = np.arange(len(p1))[:, None]
+    pos = np.arange(p1.shape[1])
+    succ = inverse(p1)[rows, p2]
+
+    # Smallest position of each cycle, by pointer doubling.
+    label = np.broadcast_to(pos, p1.shape).copy()
+    for _ in range(int(np.ceil(np.log2(max(p1.shape[1], 2)))) + 1):
+        label = np.minimum(label, label[rows, succ])
+        succ = succ[rows, succ]
+
+    rank = np.cumsum(label == pos, axis=1) - 1
+    odd = rank[rows, label] % 2 == 1
+    return np.where(odd, p2, p1), np.where(odd, p1, p2)
+
+
+def _erx(adjacency, start, rng):
+    pairs, n, _ = adjacency.shape
+    rows = np.arange(pairs)
+    valid = adjacency >= 0
+    slots = np.where(valid, adjacency, 0)
+    degree = valid.sum(axis=2)
+    used = np.zeros((pairs, n), dtype=bool)
+
+    child = np.empty((pairs, n), dtype=int)
+    current = start
+    for step in range(n):
+        child[:, step] = current
+        used[rows, current] = True
+        neighbours = slots[rows, current]
+        np.subtract.at(
+            degree, (rows[:, None], neighbours), valid[rows, current].astype(int)
+        )
+        if step == n - 1:
+            break
+
+        open_ = valid[rows, current] & ~used[rows[:, None], neighbours]
+        keys = np.where(
+            open_,
+            degree[rows[:, None], neighbours] + rng.random(neighbours.shape),
+            np.inf,
+        )
+        best = keys.argmin(axis=1)
+        nxt = neighbours[rows, best]
+
+        stuck = ~open_.any(axis=1)
+        if stuck.any():
+            noise = np.where(used[stuck], -1.0, rng.random((stuck.sum(), n)))
+            nxt[stuck] = noise.argmax(axis=1)
+        current = nxt
+    return child
+
+
+@batch
+@permutation
+def edge_recombination_crossover(p1, p2, rng=None):
+    """
+    ERX: children are built from the union of the parents' (cyclic) edges,
+    always moving to the neighbour with the fewest unused neighbours left.
+    """
+    pairs, n = p1.shape
+    rows = np.arange(pairs)[:, None]
+    adjacency = np.empty((pairs, n, 4), dtype=int)
+    for k, p in enumerate((p1, p2)):
+        adjacency[rows, p, 2 * k] = np.roll(p, 1, axis=1)
+        adjacency[rows, p, 2 * k + 1] = np.roll(p, -1, axis=1)
+
+    # Shared edges appear once.
+    adjacency.sort(axis=2)
+    duplicate = np.zeros(adjacency.shape, dtype=bool)
+    duplicate[..., 1:] = adjacency[..., 1:] == adjacency[..., :-1]
+    adjacency[duplicate] = -1
+
+    return _erx(adjacency, p1[:, 0], rng), _erx(adjacency, p2[:, 0], rng)
+
+
+@batch
+def uniform_crossover(p1, p2, rng=None):
+    mask = rng.random(p1.shape) < 0.5
+    return np.where(mask, p1, p2), np.where(mask, p2, p1)
+
+
+@batch
+def blend_crossover(p1, p2, alpha=0.5, rng=None):
+    """BLX-alpha: genes drawn uniformly around the parents' interval."""
+    low, high = np.minimum(p1, p2), np.maximum(p1, p2)
+    span = alpha * (high - low)
+    low, high = low - span, high + span
+    return rng.uniform(low, high), rng.uniform(low, high)
+
+
+@batch
+def simulated_binary_crossover(p1, p2, eta=15.0, rng=None):
+    """SBX: children spread around the parents like a one-point binary crossover."""
+    u = rng.random(p1.shape)
+    beta = np.where(
+        u <= 0.5,
+        (2 * u) ** (1 / (eta + 1)),
+        (1 / (2 * (1 - u))) ** (1 / (eta + 1)),
+    )
+    return (
+        0.5 * ((1 + beta) * p1 + (1 - beta) * p2),
+        0.5 * ((1 - beta) * p1 + (1 + beta) * p2),
+    )
+
+
+ox = order_crossover
+pmx = partially_mapped_crossover
+cx = cycle_crossover
+erx = edge_recombination_crossover
+uniform = uniform_crossover
+blx = blend_crossover
+sbx = simulated_binary_crossover
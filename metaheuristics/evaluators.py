@@ -0,0 +1,120 @@
+import os
+
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+
+_problem = None
+
+
+def init_worker(problem):
+    global _problem
+    _problem = problem
+
+
+def _evaluate(sequences):
+    return _problem.evaluate_batch(sequences)
+
+
+def chunks(sequences, n):
+    size = max(1, -(-len(sequences) // n))
+    return [sequences[i : i + size] for i in range(0, len(sequences), size)]
+
+
+class SerialEvaluator:
+    """
+    Scores batches of sequences with `Problem.evaluate_batch`, costs in order.
+
+    Pass an evaluator to a solver with `evaluator=...`: every batch the
+    solver evaluates (offspring, neighborhoods, flights) goes through it.
+    """
+
+    local = True
+
+    def __init__(self):
+        self.problem = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["problem"] = None
+        state.pop("pool", None)
+        return state
+
+    def __call__(self, problem, sequences):
+        if problem is not self.problem:
+            self.open(problem)
+        if not len(sequences):
+            return np.empty(0)
+        return self.evaluate(sequences)
+
+    def open(self, problem):
+        self.close()
+        self.problem = problem
+
+    def close(self):
+        self.problem = None
+
+    def evaluate(self, sequences):
+        return np.asarray(self.problem.evaluate_batch(sequences), dtype=float)
+
+
+class ThreadEvaluator(SerialEvaluator):
+    """
+    Spreads batches over `n_workers` threads sharing the problem; worth it
+    when the cost function releases the GIL (NumPy, I/O, external programs).
+    """
+
+    def __init__(self, n_workers=None):
+        super().__init__()
+        self.n_workers = n_workers or os.cpu_count()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(n_workers={self.n_workers})"
+
+    def open(self, problem):
+        super().open(problem)
+        self.pool = ThreadPool(self.n_workers)
+
+    def close(self):
+        pool = self.__dict__.pop("pool", None)
+        if pool is not None:
+            pool.close()
+            pool.join()
+        super().close()
+
+    @property
+    def task(self):
+        return self.problem.evaluate_batch
+
+    def evaluate(self, sequences):
+        parts = self.pool.map(self.task, chunks(sequences, self.n_workers))
+        return np.concatenate([np.asarray(p, dtype=float) for p in parts])
+
+
+class ProcessEvaluator(ThreadEvaluator):
+    """
+    Spreads batches over `n_workers` persistent processes, each holding a
+    copy of the problem: only sequences and costs cross process boundaries.
+    Solvers using it only race serially (see `Race`).
+    """
+
+    local = False
+
+    def open(self, problem):
+        SerialEvaluator.open(self, problem)
+        self.pool = Pool(self.n_workers, init_worker, (problem,))
+
+    @property
+    def task(self):
+        return _evaluate
@@ -0,0 +1,191 @@
+import math
+import os
+
+from collections import namedtuple
+from multiprocessing import Lock, Pool, current_process
+from multiprocessing.sharedctypes import RawValue
+
+import numpy as np
+
+from metaheuristics import abstract
+
+
+ExactResult = namedtuple("ExactResult", ["sequence", "cost", "evaluated", "pruned"])
+
+
+_problem = None
+_incumbent = None
+_lock = None
+
+
+def init_worker(problem, incumbent, lock):
+    global _problem, _incumbent, _lock
+    _problem, _incumbent, _lock = problem, incumbent, lock
+
+
+def has_lower_bound(problem):
+    return type(problem).lower_bound is not abstract.Problem.lower_bound
+
+
+def shard_depth(n, n_shards):
+    """Smallest prefix length giving at least `n_shards` prefixes."""
+    depth, count = 0, 1
+    while count < n_shards and depth < n - 1:
+        count *= n - depth
+        depth += 1
+    return depth
+
+
+def prefixes(elements, depth, prefix=()):
+    if len(prefix) == depth:
+        yield prefix
+        return
+    for e in elements:
+        if e not in prefix:
+            yield from prefixes(elements, depth, prefix + (e,))
+
+
+def search(prefix, elements):
+    """
+    Depth-first branch and bound over the completions of `prefix`, pruning
+    with `Problem.lower_bound` against the shared incumbent.
+    """
+    problem = _problem
+    bounded = has_lower_bound(problem)
+    best_cost, best_sequence = math.inf, None
+    evaluated = pruned = 0
+
+    sequence = list(prefix)
+    remaining = [e for e in elements if e not in prefix]
+
+    def visit():
+        nonlocal best_cost, best_sequence, evaluated, pruned
+        if not remaining:
+            evaluated += 1
+            solution = problem.solution(sequence=list(sequence))
+            if solution.correct and solution.cost < min(best_cost, _incumbent.value):
+                best_cost, best_sequence = solution.cost, list(sequence)
+                with _lock:
+                    if best_cost < _incumbent.value:
+                        _incumbent.value = best_cost
+            return
+        if bounded and sequence:
+            partial = problem.solution(sequence=list(sequence))
+            if problem.lower_bound(partial) >= _incumbent.value:
+                pruned += 1
+                return
+        for k in range(len(remaining)):
+            sequence.append(remaining.pop(k))
+            visit()
+            remaining.insert(k, sequence.pop())
+
+    visit()
+    return best_sequence, best_cost, evaluated, pruned
+
+
+def _search(args):
+    return search(*args)
+
+
+def branch_and_bound(problem, elements, n_workers=None, upper_bound=math.inf):
+    """
+    Exact minimum of `problem` over the permutations of `elements`.
+
+    The permutations are sharded by prefix over `n_workers` processes (run
+    in-process when `n_workers` is 1, or from a daemonic process, which
+    cannot start workers); workers share the incumbent cost, starting from
+    `upper_bound`, to prune each other's subtrees.
+    """
+    elements = list(elements)
+    incumbent, lock = RawValue("d", upper_bound), Lock()
+    if n_workers == 1 or current_process().daemon:
+        init_worker(problem, incumbent, lock)
+        results = [search((), elements)]
+    else:
+        n_workers = n_workers or os.cpu_count()
+        with Pool(n_workers, init_worker, (problem, incumbent, lock)) as pool:
+            depth = shard_depth(len(elements), 8 * n_workers)
+            tasks = ((prefix, elements) for prefix in prefixes(elements, depth))
+            results = list(pool.imap_unordered(_search, tasks))
+
+    sequence, cost = None, math.inf
+    for seq, c, _, _ in results:
+        if seq is not None and c < cost:
+            sequence, cost = seq, c
+    return ExactResult(
+        sequence,
+        cost,
+        sum(r[2] for r in results),
+        sum(r[3] for r in results),
+    )
+
+
+def held_karp_nbytes(n):
+    """
+    Peak memory used by `held_karp` on `n` elements: costs (float64),
+    parents (int8), masks (int64) and popcounts (uint8) of every subset, plus
+    the temporaries of the popcount and of the largest layer, whose
+    `candidates` matrix is float64 and built from a gathered copy of `dp`.
+    """
+    if n <= 0:
+        return 0
+    layer = math.comb(n, n // 2)
+    ending = math.comb(n - 1, (n - 1) // 2)
+    tables = (2 ** n) * (n * (8 + 1) + 8 + 1)
+    temporaries = (
+        (2 ** n) * (2 * 8 + 1) + 3 * 8 * layer + 8 * ending * (2 * n + 2) + 8 * n * n
+    )
+    return tables + temporaries
+
+
+def held_karp(cost, elements, depot=None, closed=False):
+    """
+    Cheapest path through all `elements` by dynamic programming over subset
+    bitmasks (Held-Karp), in O(2^n n^2) time and `held_karp_nbytes(n)` memory.
+
+    `cost[a][b]` is the cost of going from a to b. The path starts from
+    `depot` if given (the depot is not part of the returned sequence), and
+    returns to its start when `closed`.
+    """
+    cost = np.asarray(cost, dtype=float)
+    elements = list(elements)
+    first = []
+    if closed and depot is None:
+        depot, elements, first = elements[0], elements[1:], elements[:1]
+    n = len(elements)
+    if n == 0:
+        return ExactResult(first, 0.0, 0, 0)
+    if n > 127:
+        raise MemoryError(f"Held-Karp on {n} elements")
+
+    sub = cost[np.ix_(elements, elements)]
+    full = 2 ** n - 1
+    dp = np.full((2 ** n, n), np.inf)
+    parent = np.full((2 ** n, n), -1, dtype=np.int8)
+
+    masks = np.arange(2 ** n)
+    popcount = np.zeros(2 ** n, dtype=np.uint8)
+    for j in range(n):
+        popcount += ((masks >> j) & 1).astype(np.uint8)
+
+    singles = 1 << np.arange(n)
+    dp[singles, np.arange(n)] = 0.0 if depot is None else cost[depot, elements]
+
+    for size in range(2, n + 1):
+        layer = masks[popcount == size]
+        for j in range(n):
+            ending = layer[(layer >> j) & 1 == 1]
+            candidates = dp[ending ^ (1 << j)] + sub[:, j]
+            best = candidates.argmin(axis=1)
+            dp[ending, j] = candidates[np.arange(len(ending)), best]
+            parent[ending, j] = best
+
+    last = dp[full] + (cost[elements, depot] if closed else 0.0)
+    j = int(last.argmin())
+    total = float(last[j])
+
+    sequence, mask = [], full
+    while j >= 0:
+        sequence.append(elements[j])
+        mask, j = mask ^ (1 << j), int(parent[mask, j])
+    return ExactResult(first + sequence[::-1], total, n * 2 ** n, 0)
@@ -0,0 +1,406 @@
+import abc
+import copy
+import heapq
+import random
+
+from collections import defaultdict
+
+from metaheuristics import stats
+
+
+class Move(abc.ABC):
+    def __init__(self, i, j):
+        self.i = i
+        self.j = j
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.i}, {self.j})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and (self.i, self.j) == (other.i, other.j)
+
+    def __hash__(self):
+        return hash((self.__class__.__name__, self.i, self.j))
+
+    def __call__(self, sol):
+        moved = copy.copy(sol)
+        moved.sequence = self.apply(sol.sequence)
+        return moved
+
+    @classmethod
+    def random(cls, n):
+        i, j = random.sample(range(n), 2)
+        return cls(i, j)
+
+    @property
+    def span(self):
+        return min(self.i, self.j), max(self.i, self.j)
+
+    def apply(self, sequence):
+        seq = list(sequence)
+        lo, hi = self.span
+        seq[lo : hi + 1] = [sequence[self.source(k)] for k in range(lo, hi + 1)]
+        return seq
+
+    @abc.abstractmethod
+    def source(self, k):
+        """Old position of the element found at position `k` after the move."""
+
+    @abc.abstractmethod
+    def target(self, k):
+        """New position of the element found at position `k` before the move."""
+
+    @abc.abstractmethod
+    def edges(self, symmetric=True):
+        """
+        Indices k of the (k, k+1) links broken and created by the move,
+        as two iterables, the first in old and the second in new positions.
+        """
+
+
+class Swap(Move):
+    def apply(self, sequence):
+        seq = list(sequence)
+        seq[self.i], seq[self.j] = seq[self.j], seq[self.i]
+        return seq
+
+    def source(self, k):
+        if k == self.i:
+            return self.j
+        if k == self.j:
+            return self.i
+        return k
+
+    target = source
+
+    def edges(self, symmetric=True):
+        lo, hi = self.span
+        touched = {lo - 1, lo, hi - 1, hi}
+        return touched, touched
+
+
+class Insert(Move):
+    """Remove the element at position i and re-insert it at position j."""
+
+    def apply(self, sequence):
+        seq = list(sequence)
+        seq.insert(self.j, seq.pop(self.i))
+        return seq
+
+    def source(self, k):
+        i, j = self.i, self.j
+        if k == j:
+            return i
+        if i < j and i <= k < j:
+            return k + 1
+        if j < i and j < k <= i:
+            return k - 1
+        return k
+
+    def target(self, k):
+        i, j = self.i, self.j
+        if k == i:
+            return j
+        if i < j and i < k <= j:
+            return k - 1
+        if j < i and j <= k < i:
+            return k + 1
+        return k
+
+    def edges(self, symmetric=True):
+        i, j = self.i, self.j
+        if i < j:
+            return {i - 1, i, j}, {i - 1, j - 1, j}
+        return {j - 1, i - 1, i}, {j - 1, j, i}
+
+
+class TwoOpt(Move):
+    """Reverse the portion of the sequence between positions i and j."""
+
+    def apply(self, sequence):
+        seq = list(sequence)
+        lo, hi = self.span
+        seq[lo : hi + 1] = seq[lo : hi + 1][::-1]
+        return seq
+
+    def source(self, k):
+        lo, hi = self.span
+        return lo + hi - k if lo <= k <= hi else k
+
+    target = source
+
+    def edges(self, symmetric=True):
+        lo, hi = self.span
+        touched = {lo - 1, hi} if symmetric else set(range(lo - 1, hi + 1))
+        return touched, touched
+
+
+class Constraints:
+    """
+    Constraint structure of a permutation problem: `precedence` pairs (a, b),
+    a to be visited before b, and `forbidden` positions of each element.
+
+    `allows` checks a single move incrementally, looking only at the
+    positions it touches: elements outside its span keep their place, and
+    their order with the elements inside it. `random_move` draws a move
+    among the feasible ones instead, and `repair` turns any permutation,
+    e.g. a crossover child, into a feasible one.
+    """
+
+    kinds = (Swap, Insert, TwoOpt)
+
+    def __init__(self, precedence=(), forbidden=None):
+        self.successors = defaultdict(set)
+        self.predecessors = defaultdict(set)
+        for a, b in precedence:
+            self.successors[a].add(b)
+            self.predecessors[b].add(a)
+        self.forbidden = {e: set(ks) for e, ks in (forbidden or {}).items()}
+
+    def __repr__(self):
+        n = sum(len(s) for s in self.successors.values())
+        return f"{self.__class__.__name__}({n} precedences, {len(self.forbidden)} forbidden)"
+
+    def forbids(self, element, k):
+        return k in self.forbidden.get(element, ())
+
+    def admits(self, element, k, placed):
+        """
+        Whether `element` may take position `k` of a sequence built left to
+        right, after the elements in the set `placed`.
+        """
+        return not self.forbids(element, k) and self.predecessors.get(
+            element, set()
+        ) <= placed
+
+    def window(self, sequence, where, k):
+        """
+        Positions (lo, hi) the element at position `k` of the feasible
+        `sequence` may take without breaking precedence: after its last
+        predecessor and before its first successor; `where` maps elements to
+        positions.
+        """
+        e = sequence[k]
+        lo = max(
+            (where[a] for a in self.predecessors.get(e, ()) if a in where), default=-1
+        )
+        hi = min(
+            (where[b] for b in self.successors.get(e, ()) if b in where),
+            default=len(sequence),
+        )
+        return lo + 1, hi - 1
+
+    def candidates(self, sequence, kind, i, where=None):
+        """
+        Moves of `kind` (one of `kinds`) involving position `i` of the
+        feasible `sequence` that keep precedence. Swap and Insert moves also
+        avoid forbidden positions; TwoOpt moves, which displace their whole
+        span, are only bounded by precedence.
+        """
+        where = where or {e: k for k, e in enumerate(sequence)}
+        e = sequence[i]
+        lo, hi = self.window(sequence, where, i)
+        found = []
+        if kind is Insert:
+            # Elements between i and j shift by one towards i: the first one
+            # forbidden there rules out every farther j.
+            for j in range(i + 1, hi + 1):
+                if self.forbids(sequence[j], j - 1):
+                    break
+                if not self.forbids(e, j):
+                    found.append(Insert(i, j))
+            for j in range(i - 1, lo - 1, -1):
+                if self.forbids(sequence[j], j + 1):
+                    break
+                if not self.forbids(e, j):
+                    found.append(Insert(i, j))
+        elif kind is Swap:
+            for j in [*range(lo, i), *range(i + 1, hi + 1)]:
+                other_lo, other_hi = self.window(sequence, where, j)
+                if (
+                    other_lo <= i <= other_hi
+                    and not self.forbids(e, j)
+                    and not self.forbids(sequence[j], i)
+                ):
+                    found.append(Swap(i, j))
+        elif kind is TwoOpt:
+            # A reversed span must not hold both ends of a precedence pair.
+            for j in range(i + 1, len(sequence)):
+                if self.window(sequence, where, j)[0] > i:
+                    break
+                found.append(TwoOpt(i, j))
+            for j in range(i - 1, -1, -1):
+                if self.window(sequence, where, j)[1] < i:
+                    break
+                found.append(TwoOpt(j, i))
+        return found
+
+    def random_move(self, sequence, kind):
+        """
+        Random move of `kind` keeping the feasible `sequence` feasible, drawn
+        among the `candidates` of a random position; None if there is none.
+        """
+        where = {e: k for k, e in enumerate(sequence)}
+        positions = list(range(len(sequence)))
+        random.shuffle(positions)
+        for i in positions:
+            found = self.candidates(sequence, kind, i, where)
+            random.shuffle(found)
+            for move in found:
+                if kind is TwoOpt and self.forbidden and not self.allows(sequence, move):
+                    continue
+                return move
+        return None
+
+    def repair(self, sequence):
+        """
+        Feasible permutation of `sequence` keeping its order as far as
+        possible: each position, left to right, takes the earliest element of
+        `sequence` whose predecessors are placed and that is not forbidden
+        there. None when that gets stuck.
+        """
+        rank = {e: r for r, e in enumerate(sequence)}
+        waiting = {
+            e: sum(a in rank for a in self.predecessors.get(e, ())) for e in sequence
+        }
+        ready = [rank[e] for e in sequence if not waiting[e]]
+        heapq.heapify(ready)
+
+        repaired = []
+        while ready:
+            k = len(repaired)
+            skipped = []
+            while ready and self.forbids(sequence[ready[0]], k):
+                skipped.append(heapq.heappop(ready))
+            if not ready:
+                return None
+            e = sequence[heapq.heappop(ready)]
+            for r in skipped:
+                heapq.heappush(ready, r)
+            repaired.append(e)
+            for b in self.successors.get(e, ()):
+                if b in rank:
+                    waiting[b] -= 1
+                    if not waiting[b]:
+                        heapq.heappush(ready, rank[b])
+        return repaired if len(repaired) == len(sequence) else None
+
+    def ordered(self, sequence):
+        where = {e: k for k, e in enumerate(sequence)}
+        return all(
+            where[a] < where[b]
+            for a, succ in self.successors.items()
+            if a in where
+            for b in succ
+            if b in where
+        )
+
+    def feasible(self, sequence):
+        return self.ordered(sequence) and not any(
+            self.forbids(e, k) for k, e in enumerate(sequence)
+        )
+
+    def allows(self, sequence, move):
+        """Whether `move` keeps the feasible `sequence` feasible."""
+        lo, hi = move.span
+        segment = [sequence[move.source(k)] for k in range(lo, hi + 1)]
+        if self.forbidden and any(
+            self.forbids(e, k) for k, e in enumerate(segment, lo)
+        ):
+            return False
+        return not self.successors or self.ordered(segment)
+
+
+def apply(solution, move):
+    """
+    `move` applied to `solution`, or None when the result is not correct;
+    `Problem.feasible_move` spares building and checking infeasible moves.
+    """
+    stats.count("feasibility_checks")
+    feasible = solution.problem.feasible_move(solution, move)
+    if feasible is False:
+        return None
+    moved = move(solution)
+    if feasible is None and not moved.correct:
+        return None
+    return moved
+
+
+class MoveOperator:
+    """
+    Search operator drawing random moves of a given kind.
+
+    Can be used wherever a search operator such as `utils.pitch` is expected;
+    algorithms recognise it and score neighbours via `Problem.delta_cost`.
+    When the problem exposes its `constraints`, moves are drawn among the
+    feasible ones; otherwise infeasible moves are redrawn up to `max_retries`
+    times, after which the solution is returned unchanged.
+    """
+
+    def __init__(self, move, max_retries=100):
+        self.move = move
+        self.max_retries = max_retries
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.move.__name__})"
+
+    def propose(self, sol):
+        constraints = sol.problem.constraints
+        if constraints is not None and self.move in constraints.kinds:
+            move = constraints.random_move(sol.sequence, self.move)
+            if move is not None:
+                return move
+        return self.move.random(len(sol))
+
+    def __call__(self, sol):
+        for retry in range(self.max_retries + 1):
+            moved = apply(sol, self.propose(sol))
+            if moved is not None:
+                stats.count("repair_retries", retry)
+                return moved
+        stats.count("repair_retries", self.max_retries)
+        stats.count("repair_failures")
+        return copy.copy(sol)
+
+
+swap = MoveOperator(Swap)
+insert = MoveOperator(Insert)
+two_opt = MoveOperator(TwoOpt)
+
+
+def path_delta(
+    distance_matrix, sequence, move, depot=None, closed=False, symmetric=True
+):
+    """
+    Cost change of `move` on a path visiting `sequence` in order, in O(1).
+
+    The path optionally starts from `depot` and, when `closed`, returns to it
+    (or to its first element if there is no depot).
+    """
+    n = len(sequence)
+    dist = distance_matrix
+
+    def links(ks):
+        out = set()
+        for k in ks:
+            if k == -1 and depot is None:
+                if not closed:
+                    continue
+                k = n - 1
+            if k == n - 1 and not closed:
+                continue
+            out.add(k)
+        return out
+
+    def node(k, source):
+        if k == -1 or k == n:
+            if depot is not None:
+                return depot
+            return sequence[source(n - 1 if k == -1 else 0)]
+        return sequence[source(k)]
+
+    def length(ks, source):
+        return sum(dist[node(k, source)][node(k + 1, source)] for k in links(ks))
+
+    broken, created = move.edges(symmetric)
+    return length(created, move.source) - length(broken, lambda k: k)
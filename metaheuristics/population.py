@@ -0,0 +1,88 @@
+import numpy as np
+
+from metaheuristics import cache
+
+
+class ArrayPopulation:
+    """
+    Population held as a 2-D matrix of sequences, plus a cost vector and a
+    validity mask.
+
+    Members are exposed as solutions of the problem built on demand; costs are
+    filled lazily, in one `Problem.evaluate_batch` call.
+    """
+
+    def __init__(self, problem, sequences, costs=None, valid=None):
+        self.problem = problem
+        self.sequences = np.array(sequences)
+        n = len(self.sequences)
+        self.costs = (
+            np.full(n, np.nan) if costs is None else np.array(costs, dtype=float)
+        )
+        self.valid = np.ones(n, dtype=bool) if valid is None else np.array(valid)
+        self._members = [None] * n
+
+    @classmethod
+    def from_solutions(cls, problem, solutions):
+        return cls(
+            problem,
+            [s.sequence for s in solutions],
+            valid=[s.correct for s in solutions],
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)}x{self.sequences.shape[1]})"
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        member = self._members[index]
+        if member is None:
+            member = self.problem.solution(sequence=self.sequences[index].tolist())
+            self._members[index] = member
+        return member
+
+    def __setitem__(self, index, sol):
+        self.sequences[index] = sol.sequence
+        self.costs[index] = np.nan
+        self.valid[index] = sol.correct
+        self._members[index] = sol
+
+    def copy(self):
+        other = self.__class__(self.problem, self.sequences, self.costs, self.valid)
+        other._members = list(self._members)
+        return other
+
+    def evaluate(self, evaluator=None):
+        missing = np.flatnonzero(np.isnan(self.costs))
+        if missing.size:
+            self.costs[missing] = cache.evaluate_batch(
+                self.problem, self.sequences[missing], evaluator
+            )
+        return self.costs
+
+    def argmin(self):
+        return int(np.where(self.valid, self.evaluate(), np.inf).argmin())
+
+    def argmax(self):
+        return int(np.where(self.valid, self.evaluate(), -np.inf).argmax())
+
+    @property
+    def best(self):
+        return self[self.argmin()] if len(self) else None
+
+    @property
+    def worst(self):
+        return self[self.argmax()] if len(self) else None
+
+    def uniqueness(self):
+        n = len(self)
+        if n == 1:
+            return 0.0
+        return (n - len(np.unique(self.sequences, axis=0))) / (n - 1)
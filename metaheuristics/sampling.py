@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+
+_rng = None
+_pid = None
+
+
+def default_rng():
+    """Process-wide generator, re-seeded in every new (e.g. forked) process."""
+    global _rng, _pid
+    if _pid != os.getpid():
+        _rng, _pid = np.random.default_rng(), os.getpid()
+    return _rng
+
+
+def logsumexp(logits):
+    logits = np.asarray(logits, dtype=float)
+    top = logits.max()
+    if not np.isfinite(top):
+        return top
+    return top + np.log(np.exp(logits - top).sum())
+
+
+def softmax(logits):
+    logits = np.asarray(logits, dtype=float)
+    return np.exp(logits - logsumexp(logits))
+
+
+def gumbel_top_k(logits, k, rng=None):
+    """
+    Draw `k` indices without replacement, with probabilities softmax(logits),
+    via the Gumbel-top-k trick in O(n + k log k).
+
+    `logits` may be a matrix, in which case every row is an independent draw.
+    """
+    rng = rng or default_rng()
+    logits = np.asarray(logits, dtype=float)
+    keys = logits + rng.gumbel(size=logits.shape)
+    n = logits.shape[-1]
+    if k < n:
+        top = np.argpartition(-keys, k - 1, axis=-1)[..., :k]
+    else:
+        top = np.broadcast_to(np.arange(n), keys.shape)
+    order = np.argsort(-np.take_along_axis(keys, top, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(top, order, axis=-1)
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table of the probabilities softmax(logits): O(n) set-up,
+    then O(1) per draw with replacement, so it pays off as soon as the same
+    weights are drawn from more than once.
+    """
+
+    def __init__(self, logits):
+        scaled = softmax(logits) * len(logits)
+        n = len(scaled)
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, size=None, rng=None):
+        rng = rng or default_rng()
+        idx = rng.integers(len(self), size=size)
+        return np.where(rng.random(size=size) < self.prob[idx], idx, self.alias[idx])
+
+
+def sample(logits, size=None, replace=False, rng=None):
+    """
+    Draw `size` indices with probabilities softmax(logits), with or without
+    replacement; `size=None` draws as many as there are logits.
+    """
+    logits = np.asarray(logits, dtype=float)
+    size = len(logits) if size is None else size
+    if replace:
+        return AliasTable(logits).draw(size, rng)
+    if size > len(logits):
+        raise ValueError("Cannot draw more samples than items without replacement")
+    return gumbel_top_k(logits, size, rng)
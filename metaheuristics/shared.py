@@ -0,0 +1,147 @@
+import atexit
+import os
+import pickle
+import tempfile
+import weakref
+
+from multiprocessing import shared_memory
+from multiprocessing.reduction import ForkingPickler
+
+import numpy as np
+
+
+_owned = {}
+_attached = {}
+_owners = {}
+
+
+def _view(array):
+    array.flags.writeable = False
+    return array
+
+
+def _open(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach(handle):
+    """Read-only array behind `handle`, mapped once per process."""
+    backend, name, shape, dtype = handle
+    if name in _owned:
+        return _owned[name][0]
+    if name not in _attached:
+        if backend == "shm":
+            shm = _open(name)
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            _attached[name] = (_view(array), shm)
+        else:
+            _attached[name] = (np.asarray(np.load(name, mmap_mode="r")), None)
+    return _attached[name][0]
+
+
+def share_array(array, backend="shm", path=None):
+    """
+    Copy `array` once into shared memory (backend="shm") or into a
+    memory-mapped `.npy` file (backend="mmap", at `path` or a temporary file)
+    and return its handle, a small (backend, name, shape, dtype) tuple that
+    `attach` turns back into the array in any process.
+    """
+    array = np.ascontiguousarray(array)
+    if backend == "shm":
+        shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        handle = ("shm", shm.name, array.shape, array.dtype.str)
+        view = _view(np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf))
+    elif backend == "mmap":
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".npy")
+            os.close(fd)
+        np.save(path, array)
+        shm = None
+        handle = ("mmap", path, array.shape, array.dtype.str)
+        view = np.asarray(np.load(path, mmap_mode="r"))
+    else:
+        raise ValueError(f"Unknown backend {backend!r}")
+
+    _owned[handle[1]] = (view, shm)
+    return handle
+
+
+def _rebuild(func, args, state, handles):
+    obj = func(*args)
+    state = dict(state, **{name: attach(handle) for name, handle in handles.items()})
+    if hasattr(obj, "__setstate__"):
+        obj.__setstate__(state)
+    else:
+        obj.__dict__.update(state)
+    return obj
+
+
+def _reduce(obj):
+    reduced = obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    func, args, state, *items = reduced + (None,) * (5 - len(reduced))
+    if not isinstance(state, dict) or any(item is not None for item in items):
+        return reduced
+    handles = {
+        name: handle
+        for name, (handle, value) in _owners.get(id(obj), {}).items()
+        if state.get(name) is value
+    }
+    if not handles:
+        return reduced
+    state = {k: v for k, v in state.items() if k not in handles}
+    return _rebuild, (func, args, state, handles)
+
+
+def share(obj, *names, backend="shm"):
+    """
+    Copy the array attributes `names` of `obj` (typically a Problem, e.g. its
+    `distance_matrix`) once into shared memory. Missing attributes are
+    skipped.
+
+    `obj` itself is left untouched: when it is sent to a worker process
+    (pools, pipes, `Process` arguments), only the handles of those arrays
+    are pickled, and the worker's copy holds plain read-only arrays attached
+    to the same memory. The memory is released when `obj` is collected.
+    """
+    handles = _owners.setdefault(id(obj), {})
+    if not handles:
+        try:
+            weakref.finalize(obj, _forget, id(obj))
+        except TypeError:
+            pass
+    for name in names:
+        value = obj.__dict__.get(name)
+        if value is None or handles.get(name, (None, None))[1] is value:
+            continue
+        handles[name] = (share_array(value, backend=backend), value)
+    ForkingPickler.register(type(obj), _reduce)
+    return obj
+
+
+def release(handle):
+    """Free the memory behind a handle returned by `share_array`."""
+    name = handle[1]
+    _, shm = _owned.pop(name)
+    if shm is None:
+        os.remove(name)
+    else:
+        shm.unlink()
+
+
+def _forget(owner):
+    for handle, _ in _owners.pop(owner, {}).values():
+        if handle[1] in _owned:
+            release(handle)
+
+
+@atexit.register
+def _release_all():
+    for name in list(_owned):
+        try:
+            release((None, name))
+        except OSError:
+            pass
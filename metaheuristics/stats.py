@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+_active = None
+
+
+def activate(stats):
+    """Make `stats` the target of `count`, for code that has no solver at hand."""
+    global _active
+    _active = stats
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+class Stats:
+    """
+    Counters (evaluations, cache hits, feasibility checks, retries, ...) and
+    cumulative phase timers (selection, variation, evaluation, replacement)
+    of a solver run.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = defaultdict(float)
+        self.calls = Counter()
+        self.profiler = None
+
+    def __repr__(self):
+        lines = [f"{k}: {v}" for k, v in sorted(self.counters.items())]
+        lines += [
+            f"{k}: {round(v, 4)} sec ({self.calls[k]} calls)"
+            for k, v in sorted(self.timers.items(), key=lambda kv: -kv[1])
+        ]
+        if self.profiler is not None:
+            lines += [f"{k}: {n} samples" for k, n in self.profiler.top(5)]
+        return "\n".join(lines)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def as_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "timers": dict(self.timers),
+            "calls": dict(self.calls),
+            "profile": None if self.profiler is None else dict(self.profiler.samples),
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that started it every `interval` seconds
+    from a background thread; `samples` counts, per function, the samples in
+    which it was running (self) and `cumulative` those in which it was on the
+    stack.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.cumulative = Counter()
+        self._thread = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_thread"] = None
+        state.pop("_stop", None)
+        return state
+
+    @staticmethod
+    def key(code):
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def start(self):
+        self.target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            self.samples[self.key(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                k = self.key(frame.f_code)
+                if k not in seen:
+                    seen.add(k)
+                    self.cumulative[k] += 1
+                frame = frame.f_back
+
+    def top(self, n=10, cumulative=False):
+        return (self.cumulative if cumulative else self.samples).most_common(n)
@@ -0,0 +1,82 @@
+from collections import Counter, deque
+
+
+def changed(current, new):
+    """First and last positions where `new` differs from `current`."""
+    diff = [k for k, (a, b) in enumerate(zip(current.sequence, new.sequence)) if a != b]
+    return (diff[0], diff[-1]) if diff else (0, 0)
+
+
+class SolutionTabu:
+    """
+    The `length` most recently visited solutions, kept as hashes of their
+    sequences in a counter plus a deque: O(1) membership and expiry.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.keys = deque()
+        self.counts = Counter()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key(self, solution):
+        return hash(tuple(solution.sequence))
+
+    def is_tabu(self, current, new, move=None):
+        return self.key(new) in self.counts
+
+    def add(self, current, new, move=None):
+        k = self.key(new)
+        self.keys.append(k)
+        self.counts[k] += 1
+        while len(self.keys) > self.length:
+            old = self.keys.popleft()
+            self.counts[old] -= 1
+            if not self.counts[old]:
+                del self.counts[old]
+
+    def step(self):
+        ...
+
+
+class AttributeTabu:
+    """
+    Attributes of the moves made in the last `tenure` iterations: the two
+    positions a move works on (attribute="positions") or the elements found
+    there (attribute="values").
+
+    Moves are given explicitly or recovered from the positions where the
+    new solution differs from the current one.
+    """
+
+    def __init__(self, tenure, attribute="values"):
+        if attribute not in ("positions", "values"):
+            raise ValueError(f"Unknown tabu attribute {attribute!r}")
+        self.tenure = tenure
+        self.attribute = attribute
+        self.iteration = 0
+        self.expiry = {}
+
+    def __len__(self):
+        return len(self.expiry)
+
+    def key(self, current, new, move):
+        i, j = (move.i, move.j) if move is not None else changed(current, new)
+        if self.attribute == "values":
+            i, j = current.sequence[i], current.sequence[j]
+        return frozenset((i, j))
+
+    def is_tabu(self, current, new, move=None):
+        return self.expiry.get(self.key(current, new, move), 0) > self.iteration
+
+    def add(self, current, new, move=None):
+        self.expiry[self.key(current, new, move)] = self.iteration + self.tenure
+
+    def step(self):
+        self.iteration += 1
+        if len(self.expiry) > 2 * self.tenure:
+            self.expiry = {
+                k: t for k, t in self.expiry.items() if t > self.iteration
+            }
@@ -0,0 +1,108 @@
+import abc
+import time
+
+
+class Criterion(abc.ABC):
+    """
+    Stopping condition checked after every iteration of a solver.
+
+    Criteria compose with `|` (stop when any holds) and `&` (stop when all
+    hold).
+    """
+
+    def __repr__(self):
+        args = ", ".join(f"{v!r}" for v in self.__dict__.values())
+        return f"{self.__class__.__name__}({args})"
+
+    def start(self, solver):
+        ...
+
+    @abc.abstractmethod
+    def __call__(self, solver):
+        ...
+
+    def __or__(self, other):
+        return Any(self, other)
+
+    def __and__(self, other):
+        return All(self, other)
+
+
+class MaxIterations(Criterion):
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self, solver):
+        return solver.iteration >= self.n
+
+
+class Stagnation(Criterion):
+    """No improvement of the best solution for `n` iterations."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self, solver):
+        return solver.no_impr >= self.n
+
+
+class TimeLimit(Criterion):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, solver):
+        return time.time() - solver.start >= self.seconds
+
+
+class MaxEvaluations(Criterion):
+    """At least `n` cost evaluations (see `Metaheuristic.evaluations`)."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def __call__(self, solver):
+        return solver.evaluations >= self.n
+
+
+class TargetCost(Criterion):
+    def __init__(self, cost):
+        self.cost = cost
+
+    def __call__(self, solver):
+        return solver.best_cost <= self.cost
+
+
+class Any(Criterion):
+    """Holds when any of `criteria` does; `fired` is the first that did."""
+
+    def __init__(self, *criteria):
+        self.criteria = []
+        for c in criteria:
+            self.criteria.extend(c.criteria if isinstance(c, Any) else [c])
+        self.fired = None
+
+    def start(self, solver):
+        self.fired = None
+        for c in self.criteria:
+            c.start(solver)
+
+    def __call__(self, solver):
+        for c in self.criteria:
+            if c(solver):
+                self.fired = c
+                return True
+        return False
+
+
+class All(Criterion):
+    def __init__(self, *criteria):
+        self.criteria = []
+        for c in criteria:
+            self.criteria.extend(c.criteria if isinstance(c, All) else [c])
+
+    def start(self, solver):
+        for c in self.criteria:
+            c.start(solver)
+
+    def __call__(self, solver):
+        return all(c(solver) for c in self.criteria)
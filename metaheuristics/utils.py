@@ -1,5 +1,6 @@
 
 import copy
+import heapq
 import math
 try:
     import matplotlib.pyplot as plt
@@ -12,14 +13,41 @@ import random
 import statistics
 
 from itertools import islice, tee, groupby
-from multiprocessing import Pool
+from multiprocessing import Manager, Pool
+
+from metaheuristics import cache, moves, sampling, shared, stats
 
 
 def worker(args):
-    solver, _, n = args
+    solver, _, n, full, budget = args
     print(f"{solver.__class__.__name__} [{_+1}/{n}]")
+    for k, v in budget.items():
+        setattr(solver, k, v)
     solver()
-    return copy.deepcopy(solver)
+    return copy.deepcopy(solver) if full else RunSummary(solver)
+
+
+class RunSummary:
+    """Compact outcome of a solver run, cheap to send back from a worker."""
+
+    def __init__(self, solver):
+        self.name = solver.name
+        self.best_sequence = list(solver.best_solution.sequence)
+        self.best_cost = solver.best_cost
+        self.duration = solver.duration
+        self.iterations = solver.iteration
+        self.evaluations = solver.evaluations
+        self.stats = solver.stats
+        self.curve = solver.curve
+
+    def __repr__(self):
+        return f"{self.name}: {self.best_sequence} - {round(self.best_cost, 2)}"
+
+    def __lt__(self, other):
+        return self.best_cost < other.best_cost
+
+    def __gt__(self, other):
+        return self.best_cost > other.best_cost
 
 
 class BaseSolutionMixin:
@@ -70,58 +98,120 @@ class BaseSolutionMixin:
 
 
 class Race:
-    def __init__(self, solvers):
+    def __init__(
+        self,
+        solvers,
+        shared_cache=False,
+        processes=None,
+        full=False,
+        shared_arrays=(),
+        time_limit=None,
+        max_evaluations=None,
+    ):
+        """
+        `time_limit` (seconds) and `max_evaluations` give every run the same
+        budget; runs still stop at their own `n_iters` and stagnation limits,
+        so raise those to compare on budget alone.
+
+        Solvers that start their own processes (`IslandModel`,
+        `ParallelTempering`, a `ProcessEvaluator`) only race serially: the
+        workers of a parallel race are daemonic and cannot start processes.
+        `Exaustive` falls back to searching in-process there.
+        """
         self.solvers = solvers
+        self.shared_cache = shared_cache
+        self.shared_arrays = shared_arrays
+        self.processes = processes
+        self.full = full
+        self.budget = {}
+        if time_limit is not None:
+            self.budget["time_limit"] = time_limit
+        if max_evaluations is not None:
+            self.budget["max_evaluations"] = max_evaluations
+        self.pool = None
+        self.manager = None
         self.__results = []
 
     def __call__(self, n=2, parallel=False):
-        self.n = n
-        self.results = self._parallel() if parallel else self._serial()
+        self.results = list(self.run(n, parallel))
         return self
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["manager"] = None
+        return state
+
     def __repr__(self):
         self.plot
         s = []
-        grouper = groupby(self.results, key=lambda x: x.__class__.__name__)
+        res = sorted(self.results, key=lambda x: x.name)
+        grouper = groupby(res, key=lambda x: x.name)
         for _, group in grouper:
             run = list(group)
             s.append(_)
             s.append(
                 f"""Min: {
-                round(min(i.best_solution.cost for i in run), 2)}"""
+                round(min(i.best_cost for i in run), 2)}"""
             )
             s.append(
                 f"""Mean: {
                 round(statistics.mean(
-                    i.best_solution.cost for i in run), 2)}"""
+                    i.best_cost for i in run), 2)}"""
             )
             s.append(
                 f"""Std: {
                 round(statistics.stdev(
-                    i.best_solution.cost for i in run), 2)}\n"""
+                    i.best_cost for i in run), 2)}\n"""
             )
         return "\n".join(s)
 
     def __getitem__(self, value):
-        return list(filter(lambda x: x[0].__class__.__name__ == value, self.results))
+        return list(filter(lambda x: x.name == value, self.results))
 
     @property
     def todo(self):
         for solver in self.solvers:
             for _ in range(self.n):
-                yield (solver, _, self.n)
-
-    def _parallel(self):
+                yield (solver, _, self.n, self.full, self.budget)
 
-        results = []
-        pool = Pool()
-        multiple_results = pool.map_async(worker, self.todo, callback=results.extend)
-        multiple_results.wait()
+    def run(self, n=2, parallel=False):
+        """Yield each run's result as soon as it is available."""
+        self.n = n
+        return self._parallel() if parallel else self._serial()
+
+    def open(self):
+        if self.pool is None:
+            for solver in self.solvers:
+                shared.share(solver.problem, *self.shared_arrays)
+            initializer, initargs = None, ()
+            if self.shared_cache:
+                self.manager = Manager()
+                evaluations = cache.SharedEvaluationCache(self.manager.dict())
+                initializer, initargs = cache.install, (evaluations,)
+            self.pool = Pool(self.processes, initializer, initargs)
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
 
-        return results
+    def _parallel(self):
+        return self.open().imap_unordered(worker, self.todo)
 
     def _serial(self):
-        return [worker(args) for args in self.todo]
+        return (worker(args) for args in self.todo)
 
     @property
     def results(self):
@@ -133,14 +223,14 @@ class Race:
 
     @property
     def bests(self):
-        res = sorted(self.results, key=lambda x: x.__class__.__name__)
-        grouper = groupby(res, key=lambda x: x.__class__.__name__)
+        res = sorted(self.results, key=lambda x: x.name)
+        grouper = groupby(res, key=lambda x: x.name)
         return [min(trials) for _, trials in grouper]
 
     @property
     def plot(self):
         plot(self.bests)
-        show()
+        plt.show()
 
     def dump(self):
         with open("race.pkl", "wb") as f:
@@ -170,12 +260,14 @@ def discrete_order_crossover(p1, p2, cut_points=None):
     center1 = p1[cut1:cut2]
     center2 = p2[cut1:cut2]
 
-    remainder_p2 = [i for i in p2 if i not in center1]
+    in_center1 = set(center1)
+    remainder_p2 = [i for i in p2 if i not in in_center1]
     left_p2, right_p2 = remainder_p2[:cut1], remainder_p2[cut1:]
     
     o1 = left_p2 + center1 + right_p2
     
-    remainder_p1 = [i for i in p1 if i not in center2]
+    in_center2 = set(center2)
+    remainder_p1 = [i for i in p1 if i not in in_center2]
     left_p1, right_p1 = remainder_p1[:cut1], remainder_p1[cut1:]
     
     o2 = left_p1 + center2 + right_p1
@@ -211,23 +303,44 @@ def pairwise(iterable, step=1):
     return nthwise(iterable, n=2, step=step)
 
 
+def values(iterable):
+    if isinstance(iterable, np.ndarray):
+        return iterable.astype(float, copy=False)
+    return np.fromiter((float(e) for e in iterable), dtype=float, count=len(iterable))
+
+
 def weights(iterable):
-    iterable = tuple(math.exp(e) for e in iterable)
-    tot = sum(e for e in iterable)
-    return [e / tot for e in iterable]
-
-
-def pitch(sol, pos1=None, pos2=None):
-    a, b = roulette_wheel(range(len(sol)), size=2)
-    pos1 = pos1 or a
-    pos2 = pos2 or b
-    pitched = copy.copy(sol)
-    pitched_seq = list(pitched.sequence)
-    pitched_seq[pos1], pitched_seq[pos2] = pitched_seq[pos2], pitched_seq[pos1]
-    pitched.sequence = pitched_seq
-    while not pitched.correct:
-        pitched = pitch(sol)
-    return pitched
+    return sampling.softmax(values(iterable)).tolist()
+
+
+def pitch(sol, pos1=None, pos2=None, max_retries=100):
+    """
+    Swap two positions of `sol`, random unless given. Random swaps are drawn
+    among the feasible ones when the problem exposes its `constraints`;
+    otherwise infeasible swaps are redrawn at random up to `max_retries`
+    times, after which `sol` is returned unchanged.
+    """
+    constraints = sol.problem.constraints
+    if pos1 is None and pos2 is None and constraints is not None:
+        move = constraints.random_move(sol.sequence, moves.Swap)
+        pitched = None if move is None else moves.apply(sol, move)
+        if pitched is not None:
+            return pitched
+        stats.count("repair_failures")
+        return copy.copy(sol)
+
+    rng = sampling.default_rng()
+    for retry in range(max_retries + 1):
+        a, b = rng.choice(len(sol), size=2, replace=False).tolist()
+        if not retry:
+            a, b = pos1 or a, pos2 or b
+        pitched = moves.apply(sol, moves.Swap(a, b))
+        if pitched is not None:
+            stats.count("repair_retries", retry)
+            return pitched
+    stats.count("repair_retries", max_retries)
+    stats.count("repair_failures")
+    return copy.copy(sol)
 
 
 def tweak(n, length, mu, sigma):
@@ -246,22 +359,114 @@ def tweak(n, length, mu, sigma):
     return inner
 
 
-#def roulette_wheel(iterable, size=None, replace=False):
-#    return np.random.choice(
-#        len(iterable), size=size or len(iterable), replace=replace, p=weights(iterable)
-#    )#.tolist()
+def pitch_batch(sequences, rng=None, constraints=None):
+    """
+    Array form of `pitch`: every row of `sequences` with two random positions
+    swapped, among the feasible swaps of the row if `constraints` are given.
+    """
+    rng = rng or sampling.default_rng()
+    pitched = np.array(sequences)
+    if constraints is not None:
+        for row in pitched:
+            move = constraints.random_move(row.tolist(), moves.Swap)
+            if move is not None:
+                row[[move.i, move.j]] = row[[move.j, move.i]]
+        return pitched
+    k, n = pitched.shape
+    rows = np.arange(k)
+    i = rng.integers(0, n, k)
+    j = (i + rng.integers(1, n, k)) % n
+    pitched[rows, i], pitched[rows, j] = pitched[rows, j], pitched[rows, i].copy()
+    return pitched
+
+
+def tweak_batch(n, mu, sigma):
+    """Array form of `tweak`: gaussian noise on `n` random positions of every row."""
+
+    def inner(sequences, rng=None):
+        rng = rng or sampling.default_rng()
+        tweaked = np.array(sequences, dtype=float)
+        k, length = tweaked.shape
+        positions = rng.integers(0, length, (k, n))
+        rows = np.repeat(np.arange(k), n).reshape(k, n)
+        np.add.at(tweaked, (rows, positions), rng.normal(mu, sigma, (k, n)))
+        return tweaked
+
+    return inner
 
 
-def roulette_wheel(iterable, size=None, replace=False):
+def roulette_wheel(iterable, size=None, replace=False, rng=None):
+    """
+    Draw `size` indices with probabilities softmax(iterable). Pass a
+    `sampling.AliasTable` instead of the values to draw repeatedly from the
+    same weights with replacement in O(1) per index.
+    """
     size = size or len(iterable)
-    w = weights(iterable)
-    out = []
-    options = list(range(len(iterable)))
-    while len(out) != size:
-        e = random.choices(options, k=1, weights=w)[0]
-        if replace or e not in out:
-            out.append(e)
-    return out
+    if isinstance(iterable, sampling.AliasTable):
+        return iterable.draw(size, rng).tolist()
+    return sampling.sample(values(iterable), size, replace, rng).tolist()
+
+
+class DistinctCounter:
+    """
+    Number of distinct items seen, in constant memory.
+
+    K-minimum-values sketch: exact up to `k` distinct items, an estimate
+    (a few percent relative error for the default `k`) beyond.
+    """
+
+    mask = 2 ** 64 - 1
+
+    def __init__(self, k=1024):
+        self.k = k
+        self.heap = []
+        self.members = set()
+
+    def __len__(self):
+        if len(self.heap) < self.k:
+            return len(self.heap)
+        return int((self.k - 1) * (self.mask + 1) / -self.heap[0])
+
+    def mix(self, h):
+        x = h & self.mask
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & self.mask
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & self.mask
+        return x ^ (x >> 31)
+
+    def add(self, item):
+        x = self.mix(hash(item))
+        if x in self.members:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, -x)
+        elif x < -self.heap[0]:
+            self.members.discard(-heapq.heapreplace(self.heap, -x))
+        else:
+            return
+        self.members.add(x)
+
+    def update(self, iterable):
+        for item in iterable:
+            self.add(item)
+
+
+_candidate_lists = {}
+
+
+def candidate_lists(problem, k):
+    """
+    Indices of the `k` nearest neighbours of every node of
+    `problem.distance_matrix`, closest first; cached per problem.
+    """
+    key = (hash(problem), k)
+    if key not in _candidate_lists:
+        dists = np.array(problem.distance_matrix, dtype=float)
+        np.fill_diagonal(dists, np.inf)
+        k = min(k, len(dists) - 1)
+        nearest = np.argpartition(dists, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(dists, nearest, axis=1).argsort(axis=1)
+        _candidate_lists[key] = np.take_along_axis(nearest, order, axis=1)
+    return _candidate_lists[key]
 
 
 def uniqueness(iterable):
@@ -270,10 +475,14 @@ def uniqueness(iterable):
 
 
 def argmin(iterable):
+    if hasattr(iterable, "argmin"):
+        return int(iterable.argmin())
     return iterable.index(min(iterable))
 
 
 def argmax(iterable):
+    if hasattr(iterable, "argmax"):
+        return int(iterable.argmax())
     return iterable.index(max(iterable))
 
 
@@ -294,7 +503,7 @@ def plot(solvers):
     if not isinstance(solvers, list):
         solvers = [solvers]
     for solver in solvers:
-        plt.plot([i.cost for i in solver.bests], label=solver.__class__.__name__)
+        plt.plot(solver.curve, label=solver.name)
     plt.legend(
         bbox_to_anchor=(0., 1.02, 1., .102),
         loc=3,
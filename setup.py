@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name = 'metaheuristics',
@@ -10,12 +10,13 @@ setup(
     author_email="d.mezzogori@me.com",
     url = 'https://github.com/dmezzogori/metaheuristics',
     keywords = ['metaheuristics',],
+    python_requires=">=3.8",
     install_requires=["colorama", "numpy", "progressbar2"],
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Build Tools',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
-        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
     ],
 )
\ No newline at end of file
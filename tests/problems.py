@@ -0,0 +1,115 @@
+import random
+
+import numpy as np
+
+from metaheuristics import abstract, cache, moves, utils
+
+
+class TSP(abstract.Problem):
+    """Open tour from the depot 0 through `n` random points."""
+
+    def __init__(self, n, seed=0):
+        super().__init__()
+        self.n = n
+        points = np.random.RandomState(seed).rand(n + 1, 2)
+        self.distance_matrix = np.sqrt(
+            ((points[:, None] - points[None]) ** 2).sum(-1)
+        )
+
+    def config(self):
+        ...
+
+    @property
+    def random_solution(self):
+        sequence = list(range(1, self.n + 1))
+        random.shuffle(sequence)
+        return self.solution(sequence=sequence)
+
+    def solution(self, sequence=None):
+        return Tour(self, sequence=sequence)
+
+    def reset(self):
+        ...
+
+    @property
+    def difficulty(self):
+        return self.n
+
+    def __hash__(self):
+        return hash(("TSP", self.n, self.distance_matrix.tobytes()))
+
+    def delta_cost(self, solution, move):
+        return moves.path_delta(self.distance_matrix, solution.sequence, move, depot=0)
+
+
+class Tour(utils.BaseSolutionMixin, abstract.Solution):
+    @property
+    def sequence(self):
+        return self._Solution__sequence
+
+    @sequence.setter
+    def sequence(self, value):
+        self._Solution__sequence = value
+
+    @property
+    def is_complete(self):
+        return True
+
+    @property
+    def is_partial(self):
+        return False
+
+    def _correct(self):
+        return True
+
+    @property
+    def correct(self):
+        return self._correct()
+
+    @cache.cached
+    def _cost(self):
+        path = [0, *self.sequence]
+        return float(self.problem.distance_matrix[path[:-1], path[1:]].sum())
+
+    @property
+    def cost(self):
+        return self._cost()
+
+
+class ScheduledTSP(TSP):
+    """
+    TSP whose points come in chains of `chain` to visit in order, each point
+    with a few forbidden positions.
+    """
+
+    def __init__(self, n, chain=3, seed=0):
+        super().__init__(n, seed)
+        rng = random.Random(seed)
+        precedence = [
+            (e, e + 1) for e in range(1, n) if (e - 1) % chain != chain - 1
+        ]
+        forbidden = {e: rng.sample(range(n), 2) for e in range(1, n + 1)}
+        self.schedule = moves.Constraints(precedence, forbidden)
+
+    @property
+    def constraints(self):
+        return self.schedule
+
+    @property
+    def random_solution(self):
+        while True:
+            shuffled = random.sample(range(1, self.n + 1), self.n)
+            sequence = self.constraints.repair(shuffled)
+            if sequence is not None:
+                return self.solution(sequence=sequence)
+
+    def solution(self, sequence=None):
+        return ScheduledTour(self, sequence=sequence)
+
+    def __hash__(self):
+        return hash(("ScheduledTSP", super().__hash__()))
+
+
+class ScheduledTour(Tour):
+    def _correct(self):
+        return self.problem.constraints.feasible(self.sequence)
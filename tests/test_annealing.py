@@ -0,0 +1,18 @@
+import pytest
+
+from metaheuristics import algorithms
+
+from problems import TSP
+
+
+def test_calibration_with_few_samples():
+    solver = algorithms.SimulatedAnnealing(TSP(8), calibration_samples=2, n_iters=5)
+    iter(solver)
+
+    assert solver.ti > 0 and solver.tf > 0
+
+
+@pytest.mark.parametrize("samples", [0, 1])
+def test_too_few_calibration_samples(samples):
+    with pytest.raises(ValueError):
+        algorithms.SimulatedAnnealing(TSP(8), calibration_samples=samples)
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from metaheuristics import algorithms, crossover, moves, utils
+
+from problems import ScheduledTSP
+
+
+def make(kind, i, j):
+    return kind(*sorted((i, j))) if kind is moves.TwoOpt else kind(i, j)
+
+
+@pytest.mark.parametrize("kind", moves.Constraints.kinds)
+def test_candidates_are_the_feasible_moves(kind):
+    problem = ScheduledTSP(12, seed=1)
+    constraints = problem.constraints
+    sequence = problem.random_solution.sequence
+
+    for i in range(len(sequence)):
+        found = {
+            m
+            for m in constraints.candidates(sequence, kind, i)
+            if constraints.allows(sequence, m)
+        }
+        feasible = {
+            make(kind, i, j)
+            for j in range(len(sequence))
+            if j != i and constraints.feasible(make(kind, i, j).apply(sequence))
+        }
+        assert found == feasible
+        if kind is not moves.TwoOpt:
+            assert len(found) == len(constraints.candidates(sequence, kind, i))
+
+
+@pytest.mark.parametrize(
+    "operator", [moves.swap, moves.insert, moves.two_opt, utils.pitch]
+)
+def test_operators_draw_feasible_neighbours(operator):
+    random.seed(0)
+    problem = ScheduledTSP(30)
+    solver = iter(algorithms.SimulatedAnnealing(problem, n_iters=10))
+    solution = problem.random_solution
+
+    for _ in range(200):
+        neighbour = operator(solution)
+        assert neighbour.correct
+        assert neighbour.sequence != solution.sequence
+    assert not solver.stats.counters["repair_retries"]
+
+
+@pytest.mark.parametrize(
+    "operator", [utils.discrete_order_crossover, crossover.ox, crossover.pmx]
+)
+def test_crossover_children_are_repaired(operator):
+    random.seed(0)
+    problem = ScheduledTSP(30)
+    solver = iter(algorithms.Genetic(problem, crossover=operator, prob_mutation=0))
+
+    different = 0
+    for _ in range(50):
+        p1, p2 = problem.random_solution, problem.random_solution
+        children = solver.mate(p1, p2)
+        assert all(c.correct for c in children)
+        different += sum(c != p1 and c != p2 for c in children)
+
+    assert not solver.stats.counters["repair_failures"]
+    assert different > 90
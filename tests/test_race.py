@@ -0,0 +1,30 @@
+import pytest
+
+from metaheuristics import algorithms, utils
+
+from problems import TSP
+
+
+def test_race_exact_solvers():
+    problem = TSP(6)
+    solvers = [
+        algorithms.Exaustive(problem, n_workers=1),
+        algorithms.DynamicProgramming(problem, depot=0),
+    ]
+    race = utils.Race(solvers)(n=2)
+
+    assert len(race.results) == 4
+    for result in race.results:
+        assert result.iterations == 1
+        assert sorted(result.best_sequence) == list(range(1, 7))
+    dynamic, exhaustive = sorted(race.bests, key=lambda r: r.name)
+    assert dynamic.best_cost == pytest.approx(exhaustive.best_cost)
+
+
+def test_parallel_race_exact_solver():
+    problem = TSP(6)
+    with utils.Race([algorithms.Exaustive(problem, n_workers=2)], processes=1) as race:
+        race(n=2, parallel=True)
+
+    assert len(race.results) == 2
+    assert all(sorted(r.best_sequence) == list(range(1, 7)) for r in race.results)
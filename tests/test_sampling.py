@@ -0,0 +1,27 @@
+import numpy as np
+
+from metaheuristics import sampling, utils
+
+
+def test_alias_table_distribution():
+    logits = np.array([*np.log([0.5, 0.25, 0.15, 0.1]), -np.inf])
+    table = sampling.AliasTable(logits)
+    rng = np.random.default_rng(0)
+
+    draws = table.draw(200_000, rng)
+    freqs = np.bincount(draws, minlength=len(logits)) / len(draws)
+
+    assert np.allclose(freqs, sampling.softmax(logits), atol=0.005)
+    assert freqs[-1] == 0
+
+
+def test_sampling_with_replacement_uses_softmax_weights():
+    logits = [2.0, 1.0, 0.0]
+    rng = np.random.default_rng(1)
+
+    draws = sampling.sample(logits, 100_000, replace=True, rng=rng)
+    table_draws = utils.roulette_wheel(sampling.AliasTable(logits), 100_000, rng=rng)
+
+    for indices in (draws, np.array(table_draws)):
+        freqs = np.bincount(indices, minlength=3) / len(indices)
+        assert np.allclose(freqs, sampling.softmax(logits), atol=0.01)